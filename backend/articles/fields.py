@@ -0,0 +1,17 @@
+import numpy as np
+from pgvector.django import HalfVectorField
+
+
+class Float16VectorField(HalfVectorField):
+    """
+    Embedding stored as pgvector `halfvec` (2 bytes per dimension).
+    
+    Values are read back as float32 numpy arrays, the same as VectorField,
+    so clustering code can keep stacking them with np.asarray.
+    """
+    
+    def from_db_value(self, value, expression, connection):
+        value = super().from_db_value(value, expression, connection)
+        if value is None:
+            return None
+        return value.to_numpy().astype(np.float32)
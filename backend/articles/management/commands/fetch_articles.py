@@ -1,6 +1,9 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.conf import settings
+from django.db import DatabaseError, transaction
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from dateutil import parser
 from newsdataapi import NewsDataApiClient
 from articles.models import Article
@@ -15,6 +18,57 @@ class Command(BaseCommand):
         parser.add_argument('--category', type=str, default='politics', help='News category')
         parser.add_argument('--limit', type=int, default=50, help='Number of articles to fetch')
     
+    def fetch_page(self, api_client, options, page, size):
+        """Fetch one page of articles from NewsData.io."""
+        return api_client.news_api(
+            q=None,  # No specific query
+            language=options['language'],
+            country=options['country'],
+            category=options['category'],
+            page=page,
+            size=size
+        )
+    
+    def parse_pub_date(self, pub_date):
+        """Parse an article's pubDate, falling back to the current time."""
+        if not pub_date:
+            return timezone.now()
+        
+        try:
+            # NewsData.io uses "YYYY-MM-DD HH:MM:SS", which the C ISO parser handles directly
+            parsed_date = datetime.fromisoformat(pub_date)
+        except (ValueError, TypeError):
+            try:
+                parsed_date = parser.parse(pub_date)
+            except (ValueError, TypeError, OverflowError):
+                return timezone.now()
+        
+        # Make timezone-aware if naive
+        if parsed_date.tzinfo is None:
+            return timezone.make_aware(parsed_date)
+        return parsed_date
+    
+    def insert_articles(self, articles):
+        """Insert a page of articles in one query, retrying row by row if it fails."""
+        # ON CONFLICT DO NOTHING still guards against articles inserted concurrently
+        try:
+            with transaction.atomic():
+                Article.objects.bulk_create(articles, ignore_conflicts=True)
+            return
+        except DatabaseError as e:
+            self.stdout.write(
+                self.style.WARNING(f"Batch insert failed, retrying articles one by one: {str(e)}")
+            )
+        
+        for article in articles:
+            try:
+                with transaction.atomic():
+                    Article.objects.bulk_create([article], ignore_conflicts=True)
+            except DatabaseError as e:
+                self.stdout.write(
+                    self.style.WARNING(f"Failed to save article {article.url[:50]}: {str(e)}")
+                )
+    
     def handle(self, *args, **options):
         api_key = settings.NEWSDATA_API_KEY
         if not api_key:
@@ -28,68 +82,75 @@ class Command(BaseCommand):
         
         articles_created = 0
         articles_processed = 0
-        page = None
+        url_max_length = Article._meta.get_field('url').max_length
+        source_max_length = Article._meta.get_field('source').max_length
         
         try:
-            while articles_processed < options['limit']:
-                # Calculate remaining articles to fetch
-                remaining = options['limit'] - articles_processed
-                size = min(remaining, 10)  # API max is 10 per request
-                
-                # Fetch articles with pagination
-                response = api_client.news_api(
-                    q=None,  # No specific query
-                    language=options['language'],
-                    country=options['country'],
-                    category=options['category'],
-                    page=page,
-                    size=size
+            # Pages are chained by nextPage tokens, so they can't be requested in parallel.
+            # Instead the next page is fetched in the background while the current one is saved.
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                future = executor.submit(
+                    self.fetch_page, api_client, options, None, min(options['limit'], 10)
                 )
                 
-                # Process articles from response
-                for article_data in response.get('results', []):
-                    if not article_data.get('title') or not article_data.get('link'):
-                        continue
+                while future is not None:
+                    response = future.result()
+                    results = response.get('results', [])
+                    articles_processed += len(results)
                     
-                    # Parse published date
-                    published_date = timezone.now()
-                    if article_data.get('pubDate'):
-                        try:
-                            parsed_date = parser.parse(article_data['pubDate'])
-                            # Make timezone-aware if naive
-                            if parsed_date.tzinfo is None:
-                                published_date = timezone.make_aware(parsed_date)
-                            else:
-                                published_date = parsed_date
-                        except (ValueError, TypeError):
-                            published_date = timezone.now()
-                    
-                    try:
-                        article, created = Article.objects.get_or_create(
-                            url=article_data['link'],
-                            defaults={
-                                'title': article_data['title'][:500],
-                                'content': article_data.get('content', '') or article_data.get('description', ''),
-                                'source': article_data.get('source_id', 'unknown'),
-                                'published_date': published_date
-                            }
+                    # Check for next page and start fetching it right away
+                    page = response.get('nextPage')
+                    remaining = options['limit'] - articles_processed
+                    future = None
+                    if page and results and remaining > 0:
+                        future = executor.submit(
+                            self.fetch_page, api_client, options, page, min(remaining, 10)  # API max is 10 per request
                         )
+                    
+                    # Skip articles we already have with one indexed lookup on the unique url
+                    links = [article_data.get('link') for article_data in results if article_data.get('link')]
+                    known_urls = set(Article.objects.filter(url__in=links).values_list('url', flat=True))
+                    
+                    # Build articles from response; validation happens before the single DB call
+                    to_create = {}
+                    for article_data in results:
+                        if not article_data.get('title') or not article_data.get('link'):
+                            continue
                         
-                        if created:
-                            articles_created += 1
-                            self.stdout.write(f"Created: {article.title[:50]}...")
+                        url = article_data['link']
+                        if url in known_urls or url in to_create:
+                            continue
                         
-                    except Exception as e:
-                        self.stdout.write(
-                            self.style.WARNING(f"Failed to create article: {str(e)}")
+                        if len(url) > url_max_length:
+                            self.stdout.write(
+                                self.style.WARNING(f"Skipping article with too long URL: {url[:50]}...")
+                            )
+                            continue
+                        
+                        published_date = self.parse_pub_date(article_data.get('pubDate'))
+                        
+                        to_create[url] = Article(
+                            url=url,
+                            title=article_data['title'][:500],
+                            # The API sends explicit nulls; the columns are NOT NULL
+                            content=article_data.get('content') or article_data.get('description') or '',
+                            source=(article_data.get('source_id') or 'unknown')[:source_max_length],
+                            published_date=published_date
                         )
-                
-                articles_processed += len(response.get('results', []))
-                
-                # Check for next page
-                page = response.get('nextPage')
-                if not page or not response.get('results'):
-                    break
+                    
+                    if not to_create:
+                        continue
+                    
+                    self.insert_articles(list(to_create.values()))
+                    
+                    # ignore_conflicts returns no ids, so re-select to count only rows that landed
+                    saved_urls = set(
+                        Article.objects.filter(url__in=list(to_create)).values_list('url', flat=True)
+                    )
+                    articles_created += len(saved_urls)
+                    for url, article in to_create.items():
+                        if url in saved_urls:
+                            self.stdout.write(f"Created: {article.title[:50]}...")
             
             self.stdout.write(
                 self.style.SUCCESS(f'Successfully fetched {articles_created} new articles')
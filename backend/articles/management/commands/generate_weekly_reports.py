@@ -22,27 +22,30 @@ class Command(BaseCommand):
         
         week_ago = timezone.now() - timedelta(days=7)
         
-        recent_events = TimelineEvent.objects.filter(event_date__gte=week_ago)
-        active_narratives = Narrative.objects.filter(is_active=True)
-        recent_articles = Article.objects.filter(published_date__gte=week_ago)
+        # Materialize each query once and reuse the results below
+        recent_events = list(
+            TimelineEvent.objects.filter(event_date__gte=week_ago).select_related('narrative')[:10]
+        )
+        active_narratives = list(Narrative.objects.filter(is_active=True)[:5])
+        recent_articles_count = Article.objects.filter(published_date__gte=week_ago).count()
         
-        if not recent_events.exists() and not recent_articles.exists():
+        if not recent_events and not recent_articles_count:
             self.stdout.write(self.style.WARNING('No recent activity to analyze'))
             return
         
         context = []
         
-        if recent_events.exists():
+        if recent_events:
             context.append("Recent Timeline Events:")
-            for event in recent_events[:10]:
+            for event in recent_events:
                 context.append(f"- {event.narrative.name}: {event.event_type} - {event.description}")
         
-        if active_narratives.exists():
+        if active_narratives:
             context.append("\nActive Narratives:")
-            for narrative in active_narratives[:5]:
+            for narrative in active_narratives:
                 context.append(f"- {narrative.name}: {narrative.description}")
         
-        context.append(f"\nTotal articles processed this week: {recent_articles.count()}")
+        context.append(f"\nTotal articles processed this week: {recent_articles_count}")
         
         prompt = f"""
         Analyze the following narrative drift data from the past week and provide insights:
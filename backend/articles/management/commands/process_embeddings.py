@@ -1,9 +1,18 @@
 from django.core.management.base import BaseCommand
 from django.conf import settings
+from django.db import transaction
+from django.db.models.functions import Substr
 import google.generativeai as genai
+import hashlib
 import numpy as np
 import time
-from articles.models import Article
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from articles.models import Article, EmbeddingCache
+from narratives.utils.rate_limit import RateLimiter, chunked
+
+# Texts longer than MAX_EMBED_CHARS are cut to TRUNCATED_EMBED_CHARS before embedding
+MAX_EMBED_CHARS = 8000
+TRUNCATED_EMBED_CHARS = 7000
 
 
 class Command(BaseCommand):
@@ -12,7 +21,103 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('--batch-size', type=int, default=10, help='Batch size for processing')
         parser.add_argument('--limit', type=int, help='Limit number of articles to process (for testing)')
-        parser.add_argument('--delay', type=float, default=0.1, help='Delay between requests to avoid rate limiting')
+        parser.add_argument('--delay', type=float, default=0.1, help='Minimum interval between API requests to avoid rate limiting')
+        parser.add_argument('--workers', type=int, default=8, help='Number of concurrent embedding requests')
+    
+    def prepare_text(self, article):
+        """Build the text sent to the embedding API for an article."""
+        # Content arrives already cut to MAX_EMBED_CHARS by the database (see handle)
+        title = article.title
+        content = article.content_head
+        
+        # Truncate to reasonable length for embedding API without building the full string
+        if len(title) + len(content) + 2 > MAX_EMBED_CHARS:
+            # For Ukrainian text, be more conservative with truncation
+            body = content[:max(TRUNCATED_EMBED_CHARS - len(title) - 2, 0)]
+            return f"{title}\n\n{body}"[:TRUNCATED_EMBED_CHARS] + "..."
+        
+        # Prepare text for embedding, handle Ukrainian content properly
+        return f"{title}\n\n{content}"
+    
+    def content_hash(self, article):
+        """SHA-256 of the text that would be sent to the embedding API."""
+        return hashlib.sha256(self.prepare_text(article).encode('utf-8')).hexdigest()
+    
+    def embed_texts(self, texts):
+        """Embed a list of texts with a single API call."""
+        result = genai.embed_content(
+            model="models/text-embedding-004",
+            content=texts,
+            task_type="semantic_similarity"
+        )
+        return result['embedding']
+    
+    def embed_batch(self, batch, rate_limiter):
+        """
+        Embed a batch of articles, falling back to per-article requests on failure.
+        
+        Runs in a worker thread, so it must not touch the database.
+        Returns a list of vectors aligned with `batch` (None for failures).
+        """
+        texts = [self.prepare_text(article) for article in batch]
+        
+        try:
+            # One API call for the whole batch
+            rate_limiter.wait()
+            vectors = self.embed_texts(texts)
+            # A short response can't be matched back to articles; retry them one by one
+            if len(vectors) != len(texts):
+                raise ValueError(f"expected {len(texts)} embeddings, got {len(vectors)}")
+            return vectors
+        except Exception as e:
+            self.stdout.write(
+                self.style.WARNING(f"Batch embedding failed, falling back to per-article requests: {str(e)}")
+            )
+            self.wait_on_rate_limit(e)
+        
+        vectors = []
+        for article, text in zip(batch, texts):
+            try:
+                rate_limiter.wait()
+                vectors.append(self.embed_texts([text])[0])
+            except Exception as e:
+                self.stdout.write(
+                    self.style.WARNING(f"Failed to process article {article.id}: {str(e)}")
+                )
+                vectors.append(None)
+                self.wait_on_rate_limit(e)
+        
+        return vectors
+    
+    def wait_on_rate_limit(self, error):
+        """Back off for a while if the error looks like a quota/rate limit."""
+        if "quota" in str(error).lower() or "rate" in str(error).lower():
+            self.stdout.write("Rate limit hit, waiting 5 seconds...")
+            time.sleep(5)
+    
+    def iter_pages(self, queryset, page_size, limit=None):
+        """
+        Yield pages of a queryset ordered by descending id using keyset pagination.
+        
+        Each page is an index seek on the primary key (WHERE id < last_id) rather
+        than an OFFSET scan, and rows that leave the filter while processing
+        (or fail and stay in it) never shift later pages.
+        """
+        last_id = None
+        remaining = limit
+        
+        while remaining is None or remaining > 0:
+            page_queryset = queryset if last_id is None else queryset.filter(id__lt=last_id)
+            size = page_size if remaining is None else min(page_size, remaining)
+            page = list(page_queryset[:size])
+            if not page:
+                return
+            
+            yield page
+            
+            last_id = page[-1].id
+            if remaining is not None:
+                remaining -= len(page)
     
     def handle(self, *args, **options):
         api_key = settings.GOOGLE_API_KEY
@@ -24,83 +129,105 @@ class Command(BaseCommand):
         
         genai.configure(api_key=api_key)
         
-        articles_without_embeddings = Article.objects.filter(embedding__isnull=True).order_by('-published_date')
+        articles_without_embeddings = Article.objects.filter(
+            embedding__isnull=True
+        ).only('id', 'title').annotate(
+            # Let Postgres cut long articles so the full content never leaves the database
+            content_head=Substr('content', 1, MAX_EMBED_CHARS)
+        ).order_by('-id')
         
-        # Apply limit if specified
-        if options['limit']:
-            articles_without_embeddings = articles_without_embeddings[:options['limit']]
-        
-        total_articles = articles_without_embeddings.count()
+        sample_article = articles_without_embeddings.first()
         
-        if total_articles == 0:
+        if sample_article is None:
             self.stdout.write(self.style.SUCCESS('All articles already have embeddings'))
             return
         
-        self.stdout.write(f'Processing embeddings for {total_articles} articles...')
+        self.stdout.write('Processing embeddings for articles without embeddings...')
         
         # Show sample of Ukrainian content
-        sample_article = articles_without_embeddings.first()
-        if sample_article:
-            sample_text = sample_article.title[:100]
-            self.stdout.write(f'Sample article title: {sample_text}...')
-            ukrainian_chars = sum(1 for c in sample_text if c in 'іїєґІЇЄҐ')
-            self.stdout.write(f'Ukrainian characters detected: {ukrainian_chars > 0}')
+        sample_text = sample_article.title[:100]
+        self.stdout.write(f'Sample article title: {sample_text}...')
+        ukrainian_chars = sum(1 for c in sample_text if c in 'іїєґІЇЄҐ')
+        self.stdout.write(f'Ukrainian characters detected: {ukrainian_chars > 0}')
         
         batch_size = options['batch_size']
-        delay = options['delay']
+        workers = max(1, options['workers'])
+        rate_limiter = RateLimiter(options['delay'])
         processed = 0
         failed = 0
         
-        for i in range(0, total_articles, batch_size):
-            batch = articles_without_embeddings[i:i+batch_size]
-            
-            self.stdout.write(f'Processing batch {i//batch_size + 1}/{(total_articles-1)//batch_size + 1}...')
-            
-            for article in batch:
-                try:
-                    # Prepare text for embedding, handle Ukrainian content properly
-                    text_to_embed = f"{article.title}\n\n{article.content}"
-                    
-                    # Truncate to reasonable length for embedding API
-                    if len(text_to_embed) > 8000:
-                        # For Ukrainian text, be more conservative with truncation
-                        text_to_embed = text_to_embed[:7000] + "..."
-                    
-                    result = genai.embed_content(
-                        model="models/text-embedding-004",
-                        content=text_to_embed,
-                        task_type="semantic_similarity"
+        # Each round keeps up to `workers` batch requests in flight at once
+        round_size = batch_size * workers
+        batches_started = 0
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for articles in self.iter_pages(articles_without_embeddings, round_size, options['limit']):
+                # Reuse embeddings for content seen before (e.g. wire stories reposted by several outlets)
+                hashes = {article.id: self.content_hash(article) for article in articles}
+                cached = dict(
+                    EmbeddingCache.objects.filter(
+                        content_hash__in=set(hashes.values())
+                    ).values_list('content_hash', 'embedding')
+                )
+                
+                # Send each distinct uncached text to the API only once
+                pending = {}
+                for article in articles:
+                    content_hash = hashes[article.id]
+                    if content_hash not in cached:
+                        pending.setdefault(content_hash, article)
+                
+                batches = list(chunked(pending.values(), batch_size))
+                
+                if batches:
+                    self.stdout.write(
+                        f'Processing batches {batches_started + 1}-{batches_started + len(batches)}...'
                     )
-                    
-                    embedding_vector = result['embedding']
-                    
-                    if len(embedding_vector) == 768:
-                        article.embedding = embedding_vector
-                        article.save()
-                        processed += 1
-                        
-                        if processed % 100 == 0:
-                            self.stdout.write(f"Progress: {processed}/{total_articles} articles processed")
-                    else:
-                        self.stdout.write(
-                            self.style.WARNING(f"Unexpected embedding dimension: {len(embedding_vector)}")
+                    batches_started += len(batches)
+                
+                futures = {
+                    executor.submit(self.embed_batch, batch, rate_limiter): batch
+                    for batch in batches
+                }
+                
+                new_cache_entries = []
+                for future in as_completed(futures):
+                    batch = futures[future]
+                    for article, embedding_vector in zip(batch, future.result()):
+                        if embedding_vector is None:
+                            continue
+                        if len(embedding_vector) != 768:
+                            self.stdout.write(
+                                self.style.WARNING(f"Unexpected embedding dimension: {len(embedding_vector)}")
+                            )
+                            continue
+                        content_hash = hashes[article.id]
+                        cached[content_hash] = embedding_vector
+                        new_cache_entries.append(
+                            EmbeddingCache(content_hash=content_hash, embedding=embedding_vector)
                         )
+                
+                updated = []
+                for article in articles:
+                    embedding_vector = cached.get(hashes[article.id])
+                    if embedding_vector is None:
                         failed += 1
+                    else:
+                        article.embedding = embedding_vector
+                        updated.append(article)
+                
+                if new_cache_entries:
+                    EmbeddingCache.objects.bulk_create(new_cache_entries, ignore_conflicts=True)
+                
+                if updated:
+                    # One commit per round instead of one per UPDATE statement
+                    with transaction.atomic():
+                        Article.objects.bulk_update(updated, ['embedding'], batch_size=500)
+                    previous = processed
+                    processed += len(updated)
                     
-                    # Add delay to respect rate limits
-                    if delay > 0:
-                        time.sleep(delay)
-                    
-                except Exception as e:
-                    self.stdout.write(
-                        self.style.WARNING(f"Failed to process article {article.id}: {str(e)}")
-                    )
-                    failed += 1
-                    
-                    # Add longer delay on error
-                    if "quota" in str(e).lower() or "rate" in str(e).lower():
-                        self.stdout.write("Rate limit hit, waiting 5 seconds...")
-                        time.sleep(5)
+                    if processed // 100 > previous // 100:
+                        self.stdout.write(f"Progress: {processed} articles processed")
         
         self.stdout.write("="*60)
         self.stdout.write(
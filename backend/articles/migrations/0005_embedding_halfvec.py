@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-14 04:21
+
+import articles.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0004_embeddingcache'),
+    ]
+
+    operations = [
+        # halfvec needs pgvector >= 0.7 in the database
+        migrations.RunSQL('ALTER EXTENSION vector UPDATE', migrations.RunSQL.noop),
+        migrations.AlterField(
+            model_name='article',
+            name='embedding',
+            field=articles.fields.Float16VectorField(blank=True, dimensions=768, null=True),
+        ),
+        migrations.AlterField(
+            model_name='embeddingcache',
+            name='embedding',
+            field=articles.fields.Float16VectorField(dimensions=768),
+        ),
+    ]
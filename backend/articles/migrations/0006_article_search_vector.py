@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-14 04:21
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Postgres ships no Ukrainian text search configuration, so 'simple' is used for all languages.
+# The trigger only fires when title or content change, not on embedding updates.
+CREATE_SEARCH_TRIGGER = """
+CREATE TRIGGER article_search_vector_update
+BEFORE INSERT OR UPDATE OF title, content ON articles_article
+FOR EACH ROW EXECUTE FUNCTION
+tsvector_update_trigger(search_vector, 'pg_catalog.simple', title, content);
+
+UPDATE articles_article
+SET search_vector = to_tsvector('pg_catalog.simple', coalesce(title, '') || ' ' || coalesce(content, ''));
+"""
+
+DROP_SEARCH_TRIGGER = """
+DROP TRIGGER IF EXISTS article_search_vector_update ON articles_article;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0005_embedding_halfvec'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='article_search_vector_idx'),
+        ),
+        migrations.RunSQL(CREATE_SEARCH_TRIGGER, DROP_SEARCH_TRIGGER),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-14 04:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0006_article_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('embedding__isnull', False)), fields=['published_date'], name='article_pub_with_emb'),
+        ),
+    ]
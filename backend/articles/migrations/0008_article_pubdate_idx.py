@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-14 04:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0007_article_pub_with_emb'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['published_date'], name='article_pubdate_idx'),
+        ),
+    ]
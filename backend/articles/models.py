@@ -1,5 +1,7 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
-from pgvector.django import VectorField
+from .fields import Float16VectorField
 
 
 class Article(models.Model):
@@ -8,12 +10,35 @@ class Article(models.Model):
     url = models.URLField(unique=True, max_length=500)
     published_date = models.DateTimeField()
     source = models.CharField(max_length=200)
-    embedding = VectorField(dimensions=768, null=True, blank=True)
+    embedding = Float16VectorField(dimensions=768, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by a database trigger from title and content (see migration 0006)
+    search_vector = SearchVectorField(null=True, editable=False)
     
     class Meta:
         ordering = ['-published_date']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='article_search_vector_idx'),
+            # Date-range counts over all articles (historical week planning)
+            models.Index(fields=['published_date'], name='article_pubdate_idx'),
+            # Date-range scans over embedded articles used by the clustering commands
+            models.Index(
+                fields=['published_date'],
+                condition=models.Q(embedding__isnull=False),
+                name='article_pub_with_emb',
+            ),
+        ]
     
     def __str__(self):
         return self.title
+
+
+class EmbeddingCache(models.Model):
+    """Embeddings keyed by a hash of the embedded text, shared by duplicate articles."""
+    content_hash = models.CharField(max_length=64, primary_key=True)
+    embedding = Float16VectorField(dimensions=768)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return self.content_hash
@@ -1,24 +1,48 @@
 from rest_framework import generics, filters
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F
+from django.utils.cache import patch_cache_control
+from django.views.decorators.cache import cache_page
+from django.views.decorators.vary import vary_on_headers
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Article
 from .serializers import ArticleSerializer
 
 
 class ArticleListView(generics.ListAPIView):
-    queryset = Article.objects.all()
+    # The serializer never renders the vector columns; keep them out of list reads
+    queryset = Article.objects.defer('embedding', 'search_vector')
     serializer_class = ArticleSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['source', 'published_date']
-    search_fields = ['title', 'content']
     ordering_fields = ['published_date', 'created_at']
-    ordering = ['-published_date']
+    # No view-level `ordering`: OrderingFilter would replace the search rank order.
+    # The model's Meta ordering (-published_date) remains the default.
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        
+        # Full-text search over the GIN-indexed search_vector instead of LIKE scans on content
+        search = self.request.query_params.get('search', '').strip()
+        if search:
+            query = SearchQuery(search, config='simple', search_type='websearch')
+            queryset = queryset.filter(search_vector=query).annotate(
+                rank=SearchRank(F('search_vector'), query)
+            ).order_by('-rank', '-published_date')
+        
+        return queryset
 
 
+@cache_page(60 * 15)
+@vary_on_headers('Accept-Language')
 @api_view(['GET'])
 def weekly_reports(request):
-    return Response({
+    response = Response({
         'message': 'Weekly reports endpoint - implementation pending',
         'reports': []
     })
+    # cache_page sets max-age from its timeout; allow shared caches to serve stale while refreshing
+    patch_cache_control(response, public=True, stale_while_revalidate=300)
+    return response
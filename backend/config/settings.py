@@ -46,6 +46,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'corsheaders',
     'narratives',
@@ -56,6 +57,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',  # ETag / 304 for API responses
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -95,6 +97,10 @@ DATABASES = {
     )
 }
 
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://')
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -171,3 +177,7 @@ CORS_ALLOW_CREDENTIALS = True
 # API Keys
 NEWSDATA_API_KEY = env('NEWSDATA_API_KEY', default='')
 GOOGLE_API_KEY = env('GOOGLE_API_KEY', default='')
+
+# Ukrainian spaCy pipeline (narratives.utils.ukrainian_nlp)
+SPACY_BATCH_SIZE = env.int('SPACY_BATCH_SIZE', default=64)
+UKRAINIAN_NLP_DEVICE = env('UKRAINIAN_NLP_DEVICE', default='cpu')  # 'cpu' or 'gpu'
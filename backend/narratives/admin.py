@@ -14,6 +14,9 @@ class NarrativeClusterAdmin(admin.ModelAdmin):
     list_display = ('narrative', 'cluster_date', 'created_at')
     list_filter = ('narrative', 'cluster_date')
     readonly_fields = ('centroid',)
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('narrative')
 
 
 @admin.register(TimelineEvent)
@@ -21,3 +24,6 @@ class TimelineEventAdmin(admin.ModelAdmin):
     list_display = ('narrative', 'event_type', 'event_date', 'significance_score')
     list_filter = ('event_type', 'narrative', 'event_date')
     search_fields = ('description',)
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('narrative')
@@ -1,19 +1,43 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from django.db.models import Count
-from sklearn.cluster import KMeans
+from sklearn.cluster import MiniBatchKMeans
 from sklearn.metrics import silhouette_score
+from scipy.stats import entropy
 import numpy as np
 from datetime import datetime, timedelta
-from collections import Counter
-import math
 import hashlib
 import json
-from langchain_google_genai import GoogleGenerativeAI
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
 from articles.models import Article
 from narratives.models import Statement, Narrative, NarrativeCluster, TimelineEvent
 from narratives.utils.content_compression import ContentCompressor
+from narratives.utils.llm_client import get_llm
+
+# How long cluster names stay cached (seconds)
+CONTENT_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
+# How long weekly briefs stay cached for an unchanged set of narratives (seconds)
+BRIEF_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+# Parallel LLM calls: worker count, retries and a rough tokens-per-minute budget
+LLM_MAX_WORKERS = 4
+LLM_MAX_RETRIES = 3
+LLM_TOKENS_PER_MINUTE = 200000
+
+
+class ClusterStats(NamedTuple):
+    centroid: np.ndarray
+    coherence: float
+    near_duplicate_rate: float
 
 
 class Command(BaseCommand):
@@ -26,12 +50,16 @@ class Command(BaseCommand):
         parser.add_argument('--min-articles', type=int, default=5, help='Minimum articles per cluster')
         parser.add_argument('--coherence-threshold', type=float, default=0.5, help='Minimum coherence score')
         parser.add_argument('--generate-weekly-brief', action='store_true', help='Generate weekly narrative brief')
+        parser.add_argument('--verbose-metrics', action='store_true', help='Log the (sampled) silhouette score per week')
     
-    def __init__(self):
-        super().__init__()
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         self.compressor = ContentCompressor(language='uk')  # Ukrainian by default
         self.llm_calls = 0
         self.total_cost = 0.0
+        self._llm_lock = threading.Lock()
+        self._token_window_start = time.monotonic()
+        self._tokens_in_window = 0
     
     def get_llm_model(self, task_type: str = 'naming'):
         """Get appropriate LLM model based on task type."""
@@ -41,10 +69,51 @@ class Command(BaseCommand):
         
         if task_type == 'naming':
             # Cheap model for simple naming tasks
-            return GoogleGenerativeAI(model="gemini-1.5-flash", google_api_key=api_key)
+            return get_llm("gemini-1.5-flash", api_key)
         else:  # 'brief' or complex tasks
             # Better model for complex tasks
-            return GoogleGenerativeAI(model="gemini-2.5-flash", google_api_key=api_key)
+            return get_llm("gemini-2.5-flash", api_key)
+    
+    def wait_for_token_budget(self, token_count: int):
+        """Block until token_count more tokens fit in the current one-minute window."""
+        while True:
+            with self._llm_lock:
+                now = time.monotonic()
+                if now - self._token_window_start >= 60:
+                    self._token_window_start = now
+                    self._tokens_in_window = 0
+                
+                if self._tokens_in_window == 0 or self._tokens_in_window + token_count <= LLM_TOKENS_PER_MINUTE:
+                    self._tokens_in_window += token_count
+                    return
+                
+                wait_time = self._token_window_start + 60 - now
+            
+            time.sleep(wait_time)
+    
+    def invoke_llm(self, llm, prompt: str, task_type: str = 'naming') -> str:
+        """Invoke the LLM with token-budget throttling and exponential backoff, tracking cost."""
+        # ~4 characters per token
+        self.wait_for_token_budget(len(prompt) // 4)
+        
+        for attempt in range(LLM_MAX_RETRIES):
+            try:
+                response = llm.invoke(prompt)
+                break
+            except Exception:
+                if attempt == LLM_MAX_RETRIES - 1:
+                    raise
+                time.sleep(2 ** attempt)
+        
+        # Track cost
+        with self._llm_lock:
+            self.llm_calls += 1
+            if task_type == 'naming':
+                self.calculate_cost('naming', len(prompt))
+            else:
+                self.calculate_cost(task_type, len(prompt) + len(response))
+        
+        return response
     
     def calculate_cost(self, task_type: str, token_count: int = 300):
         """Calculate approximate API cost."""
@@ -58,24 +127,32 @@ class Command(BaseCommand):
         self.total_cost += cost
         return cost
     
+    def pop_counters(self) -> tuple:
+        """Return (llm_calls, total_cost) accumulated so far and reset both."""
+        with self._llm_lock:
+            counters = (self.llm_calls, self.total_cost)
+            self.llm_calls = 0
+            self.total_cost = 0.0
+        return counters
+    
     def check_content_cache(self, content_hash: str) -> dict:
-        """Check if content has been processed before (simple in-memory cache for now)."""
-        # TODO: Implement Redis cache
-        return None
+        """Check if content has been processed before."""
+        return cache.get(content_hash)
     
     def cache_content_result(self, content_hash: str, result: dict):
-        """Cache processing result (simple in-memory for now)."""
-        # TODO: Implement Redis cache
-        pass
+        """Cache processing result; TTL is jittered so entries from one run don't expire together."""
+        cache.set(content_hash, result, timeout=CONTENT_CACHE_TIMEOUT + random.randint(0, 3600))
     
-    def generate_cluster_name(self, compressed_content: dict, cluster_id: int) -> str:
+    def generate_cluster_name(self, compressed_content: dict, cluster_id: int,
+                              use_cache: bool = True) -> str:
         """Generate cluster name using cost-efficient LLM call."""
         content_hash = compressed_content.get('content_hash')
         
-        # Check cache
-        cached_result = self.check_content_cache(f"name_{content_hash}")
-        if cached_result:
-            return cached_result.get('name', f"Cluster {cluster_id}")
+        # Check cache before building the prompt
+        if use_cache:
+            cached_result = self.check_content_cache(f"name_{content_hash}")
+            if cached_result:
+                return cached_result.get('name', f"Cluster {cluster_id}")
         
         try:
             llm = self.get_llm_model('naming')
@@ -91,13 +168,9 @@ Generate a journalistic name that captures the main theme. Examples: "Climate Po
 
 Name (2-4 words only):"""
 
-            response = llm.invoke(prompt)
+            response = self.invoke_llm(llm, prompt, 'naming')
             narrative_name = response.strip().replace('"', '').replace("'", "")
             
-            # Track cost
-            self.llm_calls += 1
-            self.calculate_cost('naming', len(prompt))
-            
             # Cache result
             self.cache_content_result(f"name_{content_hash}", {'name': narrative_name})
             
@@ -113,23 +186,135 @@ Name (2-4 words only):"""
             )
             return f"News Cluster {cluster_id}"
     
+    def generate_cluster_names_batch(self, compressed_list: list, cluster_ids: list,
+                                     max_batch_size: int = 16) -> list:
+        """
+        Generate names for several clusters with one LLM call per batch.
+        
+        The instruction block is sent once per batch instead of once per cluster.
+        Cached clusters are skipped; clusters the model doesn't name fall back
+        to generate_cluster_name.
+        
+        Returns:
+            List of names aligned with compressed_list
+        """
+        names = [None] * len(compressed_list)
+        
+        # Check cache for all clusters in one round-trip
+        cache_keys = [f"name_{compressed_content.get('content_hash')}" for compressed_content in compressed_list]
+        cached_results = cache.get_many(cache_keys)
+        
+        pending = []
+        for index, cache_key in enumerate(cache_keys):
+            cached_result = cached_results.get(cache_key)
+            if cached_result:
+                names[index] = cached_result.get('name', f"Cluster {cluster_ids[index]}")
+            else:
+                pending.append(index)
+        
+        fallback = []
+        for start in range(0, len(pending), max_batch_size):
+            batch = pending[start:start + max_batch_size]
+            
+            if len(batch) > 1:
+                parsed_names = self._invoke_batch_naming([compressed_list[i] for i in batch])
+            else:
+                parsed_names = {}
+            
+            for position, index in enumerate(batch, 1):
+                narrative_name = parsed_names.get(position)
+                if narrative_name is None:
+                    # Parse failure or single cluster: use the per-cluster call
+                    fallback.append(index)
+                    continue
+                
+                self.cache_content_result(
+                    f"name_{compressed_list[index].get('content_hash')}", {'name': narrative_name}
+                )
+                names[index] = narrative_name
+        
+        if fallback:
+            with ThreadPoolExecutor(max_workers=min(LLM_MAX_WORKERS, len(fallback))) as executor:
+                fallback_names = executor.map(
+                    lambda index: self.generate_cluster_name(
+                        compressed_list[index], cluster_ids[index], use_cache=False
+                    ),
+                    fallback
+                )
+                for index, narrative_name in zip(fallback, fallback_names):
+                    names[index] = narrative_name
+        
+        return names
+    
+    def _invoke_batch_naming(self, compressed_batch: list) -> dict:
+        """Ask the LLM to name a batch of clusters; returns {position: name} for valid lines."""
+        try:
+            llm = self.get_llm_model('naming')
+            
+            cluster_blocks = []
+            for position, compressed_content in enumerate(compressed_batch, 1):
+                prompt_content = self.compressor.create_llm_prompt_content(compressed_content)
+                cluster_blocks.append(f"=== CLUSTER {position} ===\n{prompt_content}")
+            
+            prompt = f"""Analyze the following {len(compressed_batch)} clusters of news content and create a concise narrative name (2-4 words) for each:
+
+{chr(10).join(cluster_blocks)}
+
+Generate journalistic names that capture each cluster's main theme. Examples: "Climate Policy Debate", "Tech Regulation Update", "Economic Recovery Plans".
+
+Reply with exactly one line per cluster in the format "<cluster number>: <name>" and nothing else:"""
+
+            response = self.invoke_llm(llm, prompt, 'naming')
+            
+        except Exception as e:
+            self.stdout.write(
+                self.style.WARNING(f"Failed to generate batch cluster names: {str(e)}")
+            )
+            return {}
+        
+        parsed_names = {}
+        for line in response.strip().splitlines():
+            match = re.match(r'^\s*(?:cluster\s*)?(\d+)\s*[:.)-]\s*(.+)$', line, re.IGNORECASE)
+            if not match:
+                continue
+            
+            position = int(match.group(1))
+            narrative_name = match.group(2).strip().replace('"', '').replace("'", "")
+            
+            # Validate response
+            if 1 <= position <= len(compressed_batch) and narrative_name \
+                    and len(narrative_name.split()) <= 6 and len(narrative_name) <= 50:
+                parsed_names[position] = narrative_name
+        
+        return parsed_names
+    
     def generate_weekly_brief(self, week_narratives: list) -> str:
         """Generate weekly narrative summary using LLM."""
         if not week_narratives:
             return "No significant narratives detected this week."
         
+        # Create brief content from narratives
+        narrative_summaries = []
+        for narrative in week_narratives:
+            narrative_summaries.append(
+                f"• {narrative.name} ({narrative.support_count} articles, "
+                f"{narrative.unique_sources_count} sources, "
+                f"coherence: {narrative.coherence_score:.2f})"
+            )
+        
+        # Reruns over an unchanged week produce the same narratives and metrics
+        brief_source = '\n'.join(sorted(
+            f"{narrative.id}|{summary}" for narrative, summary in zip(week_narratives, narrative_summaries)
+        ))
+        brief_key = 'weekly_brief:' + hashlib.md5(brief_source.encode('utf-8')).hexdigest()
+        cached_brief = cache.get(brief_key)
+        if cached_brief:
+            self.stdout.write("   ♻️  Weekly brief served from cache")
+            return cached_brief
+        
         try:
             llm = self.get_llm_model('brief')
             
-            # Create brief content from narratives
-            narrative_summaries = []
-            for narrative in week_narratives:
-                narrative_summaries.append(
-                    f"• {narrative.name} ({narrative.support_count} articles, "
-                    f"{narrative.unique_sources_count} sources, "
-                    f"coherence: {narrative.coherence_score:.2f})"
-                )
-            
             prompt = f"""Create a concise weekly news narrative summary:
 
 Detected Narratives ({len(week_narratives)}):
@@ -142,13 +327,11 @@ Write a 2-3 sentence summary highlighting:
 
 Weekly Summary:"""
 
-            response = llm.invoke(prompt)
+            response = self.invoke_llm(llm, prompt, 'brief')
             
-            # Track cost
-            self.llm_calls += 1
-            self.calculate_cost('brief', len(prompt) + len(response))
-            
-            return response.strip()
+            brief = response.strip()
+            cache.set(brief_key, brief, timeout=BRIEF_CACHE_TIMEOUT)
+            return brief
             
         except Exception as e:
             self.stdout.write(
@@ -158,174 +341,246 @@ Weekly Summary:"""
     
     def process_week_batch(self, start_date: datetime, end_date: datetime, 
                           clusters_per_week: int, min_sources: int, 
-                          min_articles: int, coherence_threshold: float) -> list:
+                          min_articles: int, coherence_threshold: float,
+                          verbose_metrics: bool = False) -> list:
         """Process one week of articles into narratives."""
         
         self.stdout.write(f"Processing week: {start_date.date()} to {end_date.date()}")
         
-        # Get articles for this week with embeddings
+        # Get articles for this week with embeddings; only the columns needed to cluster and filter
         week_articles = Article.objects.filter(
             published_date__gte=start_date,
             published_date__lt=end_date,
             embedding__isnull=False
-        ).select_related()
+        )
+        total_articles = week_articles.count()
         
-        if week_articles.count() < clusters_per_week:
-            self.stdout.write(f"  Not enough articles: {week_articles.count()}")
+        if total_articles < clusters_per_week:
+            self.stdout.write(f"  Not enough articles: {total_articles}")
             return []
         
-        self.stdout.write(f"  Found {week_articles.count()} articles")
+        self.stdout.write(f"  Found {total_articles} articles")
+        
+        # Stream rows into preallocated per-article columns
+        article_ids = np.empty(total_articles, dtype=np.int64)
+        sources = np.empty(total_articles, dtype=object)
+        dates = np.empty(total_articles, dtype='datetime64[D]')
+        embeddings = None
+        
+        row_count = 0
+        rows = week_articles.values('id', 'source', 'published_date', 'embedding').iterator(chunk_size=2000)
+        for row in rows:
+            if row_count == total_articles:
+                break  # Articles added since the count
+            if embeddings is None:
+                embeddings = np.empty((total_articles, len(row['embedding'])), dtype=np.float32)
+            article_ids[row_count] = row['id']
+            sources[row_count] = row['source']
+            dates[row_count] = row['published_date'].date()
+            embeddings[row_count] = row['embedding']
+            row_count += 1
+        
+        if row_count < clusters_per_week:
+            self.stdout.write(f"  Not enough articles: {row_count}")
+            return []
         
-        # Extract embeddings and articles
-        articles = list(week_articles)
-        embeddings = np.array([article.embedding for article in articles])
+        article_ids = article_ids[:row_count]
+        sources = sources[:row_count]
+        dates = dates[:row_count]
+        embeddings = embeddings[:row_count]
         
         # Perform clustering
-        kmeans = KMeans(n_clusters=clusters_per_week, random_state=42, n_init=10)
+        kmeans = MiniBatchKMeans(
+            n_clusters=clusters_per_week, random_state=42, n_init=3,
+            batch_size=1024, reassignment_ratio=0.01
+        )
         cluster_labels = kmeans.fit_predict(embeddings)
         
-        # Calculate overall quality
-        if len(embeddings) > clusters_per_week:
-            silhouette_avg = silhouette_score(embeddings, cluster_labels)
+        # Calculate overall quality (logging only)
+        if verbose_metrics and len(embeddings) > clusters_per_week:
+            silhouette_avg = silhouette_score(
+                embeddings, cluster_labels, metric='cosine',
+                sample_size=min(2000, len(embeddings)), random_state=42
+            )
             self.stdout.write(f"  Silhouette score: {silhouette_avg:.3f}")
         
-        week_narratives = []
-        
-        # Process each cluster
+        # Filter clusters on the lightweight columns
+        candidates = []
         for cluster_id in range(clusters_per_week):
             cluster_indices = np.where(cluster_labels == cluster_id)[0]
-            cluster_articles = [articles[i] for i in cluster_indices]
             cluster_embeddings = embeddings[cluster_indices]
             
             # Apply quality filters
-            if len(cluster_articles) < min_articles:
+            if len(cluster_indices) < min_articles:
                 continue
             
-            unique_sources = set(article.source for article in cluster_articles)
+            unique_sources, source_counts = np.unique(sources[cluster_indices], return_counts=True)
             if len(unique_sources) < min_sources:
                 continue
             
-            unique_dates = set(article.published_date.date() for article in cluster_articles)
+            unique_dates = np.unique(dates[cluster_indices])
             if len(unique_dates) < 2:  # At least 2 different days
                 continue
             
-            # Calculate coherence
-            coherence_score = self.compressor.calculate_coherence_score(cluster_embeddings)
+            # Coherence, duplicate rate and centroid from one pass over the embeddings
+            stats = self._cluster_stats(cluster_embeddings)
+            coherence_score = stats.coherence
             if coherence_score < coherence_threshold:
                 continue
             
+            candidates.append({
+                'cluster_id': cluster_id,
+                'article_ids': article_ids[cluster_indices].tolist(),
+                'embeddings': cluster_embeddings,
+                'unique_sources': unique_sources,
+                'source_counts': source_counts,
+                'unique_dates': unique_dates,
+                'coherence_score': coherence_score,
+                'stats': stats,
+            })
+        
+        # Load full articles only for the clusters that passed the filters
+        articles_by_id = Article.objects.defer('embedding', 'search_vector').in_bulk(
+            [article_id for candidate in candidates for article_id in candidate['article_ids']]
+        )
+        
+        for candidate in candidates:
+            candidate['articles'] = [articles_by_id[article_id] for article_id in candidate['article_ids']]
+            
             # Compress content for efficient LLM processing
-            compressed_content = self.compressor.compress_cluster_content(
-                cluster_articles, 
-                cluster_embeddings,
+            candidate['compressed_content'] = self.compressor.compress_cluster_content(
+                candidate['articles'], 
+                candidate['embeddings'],
                 max_medoids=3,
                 max_sentences=6,
                 max_terms=12
             )
-            
-            # Generate narrative name using compressed content
-            narrative_name = self.generate_cluster_name(compressed_content, cluster_id)
+        
+        # Name all qualifying clusters with as few LLM calls as possible
+        narrative_names = self.generate_cluster_names_batch(
+            [candidate['compressed_content'] for candidate in candidates],
+            [candidate['cluster_id'] for candidate in candidates]
+        )
+        
+        # Look up existing narratives in one query; new ones are created in bulk below
+        narratives_by_name = {}
+        for narrative in Narrative.objects.filter(name__in=set(narrative_names)):
+            narratives_by_name.setdefault(narrative.name, narrative)
+        
+        metric_fields = [
+            'source_diversity_score', 'support_count', 'unique_sources_count',
+            'coherence_score', 'near_duplicate_rate', 'persistence_days'
+        ]
+        new_narratives = {}
+        updated_narratives = {}
+        new_clusters = []
+        new_events = []
+        week_narratives = []
+        
+        for candidate, narrative_name in zip(candidates, narrative_names):
+            cluster_articles = candidate['articles']
+            unique_sources = candidate['unique_sources']
+            unique_dates = candidate['unique_dates']
+            coherence_score = candidate['coherence_score']
+            stats = candidate['stats']
+            compressed_content = candidate['compressed_content']
             
             # Calculate quality metrics
-            source_diversity = self.calculate_source_diversity(cluster_articles)
-            near_duplicate_rate = self.calculate_near_duplicate_rate(cluster_articles)
-            
-            # Create description
-            description = f"Weekly narrative with {len(cluster_articles)} articles from {len(unique_sources)} sources. Compression: {compressed_content.get('compression_ratio', 0):.1%}"
-            
-            # Create narrative
-            narrative, created = Narrative.objects.get_or_create(
-                name=narrative_name,
-                defaults={
-                    'description': description,
-                    'source_diversity_score': source_diversity,
-                    'support_count': len(cluster_articles),
-                    'unique_sources_count': len(unique_sources),
-                    'coherence_score': coherence_score,
-                    'near_duplicate_rate': near_duplicate_rate,
-                    'persistence_days': len(unique_dates)
-                }
-            )
+            source_diversity = self.calculate_source_diversity(candidate['source_counts'])
+            metrics = {
+                'source_diversity_score': source_diversity,
+                'support_count': len(cluster_articles),
+                'unique_sources_count': len(unique_sources),
+                'coherence_score': coherence_score,
+                'near_duplicate_rate': stats.near_duplicate_rate,
+                'persistence_days': len(unique_dates)
+            }
             
-            if not created:
+            narrative = narratives_by_name.get(narrative_name) or new_narratives.get(narrative_name)
+            if narrative is None:
+                # Create description
+                description = f"Weekly narrative with {len(cluster_articles)} articles from {len(unique_sources)} sources. Compression: {compressed_content.get('compression_ratio', 0):.1%}"
+                narrative = Narrative(name=narrative_name, description=description, **metrics)
+                new_narratives[narrative_name] = narrative
+            else:
                 # Update existing narrative
-                narrative.source_diversity_score = source_diversity
-                narrative.support_count = len(cluster_articles)
-                narrative.unique_sources_count = len(unique_sources)
-                narrative.coherence_score = coherence_score
-                narrative.near_duplicate_rate = near_duplicate_rate
-                narrative.persistence_days = len(unique_dates)
-                narrative.save()
-            
-            # Create cluster
-            cluster = NarrativeCluster.objects.create(
-                narrative=narrative,
-                cluster_date=start_date.date(),
-                centroid=kmeans.cluster_centers_[cluster_id].tolist()
-            )
-            cluster.articles.add(*cluster_articles)
+                for field, value in metrics.items():
+                    setattr(narrative, field, value)
+                if narrative_name in narratives_by_name:
+                    updated_narratives[narrative.pk] = narrative
             
-            # Create timeline event
-            TimelineEvent.objects.create(
+            new_clusters.append((
+                NarrativeCluster(
+                    narrative=narrative,
+                    cluster_date=start_date.date(),
+                    centroid=stats.centroid.tolist()
+                ),
+                candidate['article_ids']
+            ))
+            
+            new_events.append(TimelineEvent(
                 narrative=narrative,
                 event_type='emergence',
                 description=f"Weekly narrative: {len(cluster_articles)} articles, coherence {coherence_score:.3f}",
                 event_date=start_date,
                 significance_score=coherence_score * source_diversity,
-            )
+            ))
             
             week_narratives.append(narrative)
+        
+        with transaction.atomic():
+            Narrative.objects.bulk_create(new_narratives.values())
+            Narrative.objects.bulk_update(updated_narratives.values(), metric_fields)
             
+            NarrativeCluster.objects.bulk_create([cluster for cluster, _ in new_clusters])
+            
+            ClusterArticle = NarrativeCluster.articles.through
+            ClusterArticle.objects.bulk_create([
+                ClusterArticle(narrativecluster_id=cluster.id, article_id=article_id)
+                for cluster, cluster_article_ids in new_clusters
+                for article_id in cluster_article_ids
+            ], ignore_conflicts=True)
+            
+            TimelineEvent.objects.bulk_create(new_events)
+        
+        for candidate, narrative in zip(candidates, week_narratives):
             self.stdout.write(
                 self.style.SUCCESS(
-                    f"  ✓ {narrative_name}: {len(cluster_articles)} articles, "
-                    f"{len(unique_sources)} sources, coherence {coherence_score:.3f}"
+                    f"  ✓ {narrative.name}: {len(candidate['articles'])} articles, "
+                    f"{len(candidate['unique_sources'])} sources, coherence {candidate['coherence_score']:.3f}"
                 )
             )
         
         return week_narratives
     
-    def calculate_source_diversity(self, articles):
-        """Calculate source diversity using entropy."""
-        sources = [article.source for article in articles]
-        source_counts = Counter(sources)
-        
+    def calculate_source_diversity(self, source_counts):
+        """Calculate source diversity using entropy of per-source article counts."""
         if len(source_counts) <= 1:
             return 0.0
         
-        total = len(sources)
-        entropy = 0.0
-        for count in source_counts.values():
-            p = count / total
-            if p > 0:
-                entropy -= p * math.log2(p)
-        
-        max_entropy = math.log2(len(source_counts))
-        return entropy / max_entropy if max_entropy > 0 else 0.0
+        # Normalized by maximum possible entropy
+        return float(entropy(source_counts, base=2) / np.log2(len(source_counts)))
     
-    def calculate_near_duplicate_rate(self, articles):
-        """Calculate near-duplicate rate."""
-        if len(articles) < 2:
-            return 0.0
+    def _cluster_stats(self, embeddings) -> ClusterStats:
+        """Compute centroid, coherence and near-duplicate rate from one normalized similarity matrix."""
+        embeddings_array = np.ascontiguousarray(embeddings, dtype=np.float32)
+        centroid = embeddings_array.mean(axis=0)
         
-        embeddings = [article.embedding for article in articles if article.embedding is not None]
-        if len(embeddings) < 2:
-            return 0.0
+        if len(embeddings_array) < 2:
+            return ClusterStats(centroid, 1.0, 0.0)  # Perfect coherence for single article
         
-        from sklearn.metrics.pairwise import cosine_similarity
-        embeddings_array = np.array(embeddings)
-        similarities = cosine_similarity(embeddings_array)
+        norms = np.linalg.norm(embeddings_array, axis=1, keepdims=True)
+        normalized = embeddings_array / np.maximum(norms, 1e-12)
+        similarities = normalized @ normalized.T
         
-        high_similarity_count = 0
-        total_pairs = 0
+        # Upper triangle (excluding diagonal)
+        upper = np.triu_indices(len(similarities), k=1)
+        pair_similarities = similarities[upper]
         
-        for i in range(len(similarities)):
-            for j in range(i + 1, len(similarities)):
-                if similarities[i][j] > 0.95:
-                    high_similarity_count += 1
-                total_pairs += 1
+        coherence = float(pair_similarities.mean())
+        near_duplicate_rate = float((pair_similarities > 0.95).mean())
         
-        return high_similarity_count / total_pairs if total_pairs > 0 else 0.0
+        return ClusterStats(centroid, coherence, near_duplicate_rate)
     
     def handle(self, *args, **options):
         weeks = options['weeks']
@@ -334,11 +589,13 @@ Weekly Summary:"""
         min_articles = options['min_articles']
         coherence_threshold = options['coherence_threshold']
         generate_brief = options['generate_weekly_brief']
+        verbose_metrics = options['verbose_metrics']
         
         self.stdout.write(f"Cost-efficient clustering: {weeks} weeks, {clusters_per_week} clusters/week")
         self.stdout.write(f"Quality filters: ≥{min_sources} sources, ≥{min_articles} articles, coherence ≥{coherence_threshold}")
         
         all_narratives = []
+        narratives_by_week = []
         
         # Process each week
         for week_num in range(weeks):
@@ -348,14 +605,23 @@ Weekly Summary:"""
             
             week_narratives = self.process_week_batch(
                 start_date, end_date, clusters_per_week, 
-                min_sources, min_articles, coherence_threshold
+                min_sources, min_articles, coherence_threshold,
+                verbose_metrics=verbose_metrics
             )
             
             all_narratives.extend(week_narratives)
+            if week_narratives:
+                narratives_by_week.append((week_num, week_narratives))
+        
+        # Generate weekly briefs if requested; the LLM calls for different weeks run in parallel
+        if generate_brief and narratives_by_week:
+            with ThreadPoolExecutor(max_workers=min(LLM_MAX_WORKERS, len(narratives_by_week))) as executor:
+                briefs = list(executor.map(
+                    self.generate_weekly_brief,
+                    [week_narratives for _, week_narratives in narratives_by_week]
+                ))
             
-            # Generate weekly brief if requested
-            if generate_brief and week_narratives:
-                brief = self.generate_weekly_brief(week_narratives)
+            for (week_num, _), brief in zip(narratives_by_week, briefs):
                 self.stdout.write(f"\\n📋 Week {week_num + 1} Brief:")
                 self.stdout.write(f"   {brief}\\n")
         
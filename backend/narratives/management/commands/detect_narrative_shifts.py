@@ -1,12 +1,17 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.conf import settings
-from sklearn.cluster import KMeans
+from sklearn.cluster import MiniBatchKMeans
 import numpy as np
 from datetime import datetime, timedelta
-from langchain_google_genai import GoogleGenerativeAI
+from pgvector.django import L2Distance
 from articles.models import Article
-from narratives.models import Narrative, NarrativeCluster, TimelineEvent
+from narratives.models import ClusteringState, Narrative, NarrativeCluster, TimelineEvent
+from narratives.utils.embeddings import to_float32_matrix
+from narratives.utils.llm_client import get_llm
+
+# ClusteringState row holding this command's centroids between runs
+CLUSTERING_STATE_KEY = 'detect_narrative_shifts'
 
 
 class Command(BaseCommand):
@@ -15,19 +20,21 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('--days', type=int, default=7, help='Number of days to analyze')
         parser.add_argument('--clusters', type=int, default=5, help='Number of clusters')
+        parser.add_argument('--sample-size', type=int, default=5000,
+                            help='Fit centroids on at most this many articles and assign the rest in the database')
     
-    def generate_narrative_name(self, cluster_articles, cluster_id):
-        """Generate a meaningful narrative name using LLM based on cluster articles."""
+    def generate_narrative_name(self, cluster_titles, cluster_id):
+        """Generate a meaningful narrative name using LLM based on cluster article titles."""
         api_key = settings.GOOGLE_API_KEY
         if not api_key:
             return f"Narrative Cluster {timezone.now().strftime('%Y%m%d')} - {cluster_id}"
         
         try:
             # Initialize LLM
-            llm = GoogleGenerativeAI(model="gemini-2.5-flash-lite", google_api_key=api_key)
+            llm = get_llm("gemini-2.5-flash-lite", api_key)
             
             # Prepare article titles for analysis
-            titles = [article.title for article in cluster_articles[:5]]  # Use up to 5 titles
+            titles = cluster_titles[:5]  # Use up to 5 titles
             titles_text = "\n".join([f"- {title}" for title in titles])
             
             # Create prompt for generating narrative name
@@ -64,9 +71,67 @@ Narrative name:"""
             )
             return f"Narrative Cluster {timezone.now().strftime('%Y%m%d')} - {cluster_id}"
     
+    def load_previous_centroids(self, n_clusters):
+        """
+        Load the centroids saved by this command's previous run.
+        
+        NarrativeCluster rows are not used: other commands write centroids
+        there too, and empty or merged clusters are never stored.
+        
+        Returns:
+            Tuple of (centroids array, run time), or (None, None) when there is
+            no previous run with the same number of clusters
+        """
+        state = ClusteringState.objects.filter(key=CLUSTERING_STATE_KEY).first()
+        if state is None:
+            return None, None
+        
+        centroids = np.asarray(state.centroids, dtype=np.float32)
+        if centroids.ndim != 2 or len(centroids) != n_clusters:
+            return None, None
+        
+        return centroids, state.last_run_at
+    
+    def save_centroids(self, kmeans, run_started):
+        """Store every k-means center for the next run to warm-start from."""
+        ClusteringState.objects.update_or_create(
+            key=CLUSTERING_STATE_KEY,
+            defaults={
+                'centroids': kmeans.cluster_centers_.astype(np.float32).tolist(),
+                'last_run_at': run_started,
+            }
+        )
+    
+    def assign_clusters_in_db(self, queryset, centers):
+        """
+        Assign every article in queryset to its nearest centroid using pgvector.
+        
+        Only one distance per centroid is transferred for each article instead
+        of the full 768-dimensional embedding.
+        
+        Returns:
+            Tuple of (article_ids, titles, cluster_labels)
+        """
+        distances = {
+            f'distance_{i}': L2Distance('embedding', center.tolist())
+            for i, center in enumerate(centers)
+        }
+        rows = list(
+            queryset.annotate(**distances).order_by().values_list('id', 'title', *distances.keys())
+        )
+        
+        article_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        titles = [row[1] for row in rows]
+        distance_matrix = np.asarray([row[2:] for row in rows], dtype=np.float32)
+        
+        return article_ids, titles, np.argmin(distance_matrix, axis=1)
+    
     def handle(self, *args, **options):
         days_back = options['days']
         n_clusters = options['clusters']
+        sample_size = options['sample_size']
+        # Articles created while this run is in progress are picked up by the next one
+        run_started = timezone.now()
         
         cutoff_date = timezone.now() - timedelta(days=days_back)
         recent_articles = Article.objects.filter(
@@ -74,69 +139,163 @@ Narrative name:"""
             embedding__isnull=False
         )
         
-        if recent_articles.count() < n_clusters:
+        total_articles = recent_articles.count()
+        if total_articles < n_clusters:
             self.stdout.write(
                 self.style.WARNING('Not enough articles with embeddings for clustering')
             )
             return
         
-        embeddings = []
-        articles = list(recent_articles)
-        
-        for article in articles:
-            if article.embedding is not None:
-                embeddings.append(article.embedding)
+        previous_centroids, last_run_time = self.load_previous_centroids(n_clusters)
         
-        if len(embeddings) < n_clusters:
-            self.stdout.write(
-                self.style.WARNING('Not enough valid embeddings for clustering')
+        if previous_centroids is not None:
+            # Warm start from the previous run's centroids
+            kmeans = MiniBatchKMeans(
+                n_clusters=n_clusters, init=previous_centroids, n_init=1,
+                random_state=42, batch_size=1024, reassignment_ratio=0.01
             )
-            return
+            new_embeddings = list(
+                recent_articles.filter(created_at__gt=last_run_time)
+                .order_by('?').values_list('embedding', flat=True)[:sample_size]
+            )
+        else:
+            kmeans = MiniBatchKMeans(
+                n_clusters=n_clusters, random_state=42, batch_size=1024,
+                n_init=3, reassignment_ratio=0.01
+            )
+            new_embeddings = []
+        
+        fitted = False
+        if len(new_embeddings) >= n_clusters:
+            # Only articles added since the last run move the centroids
+            self.stdout.write(f"Updating previous centroids with {len(new_embeddings)} new articles")
+            kmeans.partial_fit(to_float32_matrix(new_embeddings))
+            fitted = True
         
-        embeddings_array = np.array(embeddings)
+        if total_articles > sample_size:
+            if not fitted:
+                # Fit centroids on a random sample
+                sample = list(recent_articles.order_by('?').values_list('embedding', flat=True)[:sample_size])
+                kmeans.fit(to_float32_matrix(sample))
+            # Let Postgres do the assign step
+            article_ids, titles, cluster_labels = self.assign_clusters_in_db(
+                recent_articles, kmeans.cluster_centers_
+            )
+        else:
+            # Only the columns used for clustering and naming; skips the large content field.
+            # Rows are streamed into preallocated arrays sized by the count above.
+            article_ids = np.empty(total_articles, dtype=np.int64)
+            titles = []
+            embeddings_array = None
+            
+            rows = recent_articles.values_list('id', 'title', 'embedding').iterator(chunk_size=2000)
+            for i, (article_id, title, embedding) in enumerate(rows):
+                if i == total_articles:
+                    break  # Articles added since the count
+                if embeddings_array is None:
+                    embeddings_array = np.empty((total_articles, len(embedding)), dtype=np.float32)
+                article_ids[i] = article_id
+                titles.append(title)
+                embeddings_array[i] = embedding
+            
+            article_ids = article_ids[:len(titles)]
+            embeddings_array = embeddings_array[:len(titles)]
+            
+            if fitted:
+                cluster_labels = kmeans.predict(embeddings_array)
+            else:
+                cluster_labels = kmeans.fit_predict(embeddings_array)
         
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-        cluster_labels = kmeans.fit_predict(embeddings_array)
+        today = timezone.now().date()
         
-        clusters_created = 0
+        # Group articles by cluster in one pass: sort once, then slice contiguous runs
+        order = np.argsort(cluster_labels, kind='stable')
+        boundaries = np.searchsorted(cluster_labels[order], np.arange(n_clusters + 1))
         
+        # Name each non-empty cluster
+        cluster_groups = []
         for cluster_id in range(n_clusters):
-            cluster_articles = [articles[i] for i, label in enumerate(cluster_labels) if label == cluster_id]
+            cluster_indices = order[boundaries[cluster_id]:boundaries[cluster_id + 1]]
             
-            if not cluster_articles:
+            if not len(cluster_indices):
                 continue
             
-            # Generate meaningful narrative name using LLM
-            narrative_name = self.generate_narrative_name(cluster_articles, cluster_id)
-            
-            sample_titles = [article.title for article in cluster_articles[:3]]
-            description = f"Cluster containing {len(cluster_articles)} articles. Sample: {', '.join(sample_titles)}"
+            cluster_article_ids = article_ids[cluster_indices]
+            cluster_titles = [titles[i] for i in cluster_indices]
             
-            narrative, created = Narrative.objects.get_or_create(
-                name=narrative_name,
-                defaults={'description': description}
-            )
+            # Generate meaningful narrative name using LLM
+            narrative_name = self.generate_narrative_name(cluster_titles, cluster_id)
+            cluster_groups.append((cluster_id, narrative_name, cluster_article_ids, cluster_titles))
+        
+        # Look up existing narratives in one query, create the missing ones in bulk
+        names = {group[1] for group in cluster_groups}
+        narratives_by_name = {}
+        for narrative in Narrative.objects.filter(name__in=names):
+            narratives_by_name.setdefault(narrative.name, narrative)
+        
+        new_narratives = {}
+        for _, narrative_name, cluster_article_ids, cluster_titles in cluster_groups:
+            if narrative_name in narratives_by_name or narrative_name in new_narratives:
+                continue
+            sample_titles = cluster_titles[:3]
+            description = f"Cluster containing {len(cluster_article_ids)} articles. Sample: {', '.join(sample_titles)}"
+            new_narratives[narrative_name] = Narrative(name=narrative_name, description=description)
+        
+        Narrative.objects.bulk_create(new_narratives.values())
+        narratives_by_name.update(new_narratives)
+        
+        # Only one cluster per narrative per day
+        existing_cluster_narratives = set(
+            NarrativeCluster.objects.filter(
+                narrative__in=narratives_by_name.values(),
+                cluster_date=today
+            ).values_list('narrative_id', flat=True)
+        )
+        
+        centroids_list = kmeans.cluster_centers_.astype(np.float32).tolist()
+        new_clusters = []
+        new_events = []
+        for cluster_id, narrative_name, cluster_article_ids, _ in cluster_groups:
+            narrative = narratives_by_name[narrative_name]
+            if narrative.id in existing_cluster_narratives:
+                continue
+            existing_cluster_narratives.add(narrative.id)
             
-            cluster, cluster_created = NarrativeCluster.objects.get_or_create(
-                narrative=narrative,
-                cluster_date=timezone.now().date(),
-                defaults={'centroid': kmeans.cluster_centers_[cluster_id].tolist()}
-            )
+            new_clusters.append((
+                NarrativeCluster(
+                    narrative=narrative,
+                    cluster_date=today,
+                    centroid=centroids_list[cluster_id]
+                ),
+                cluster_article_ids
+            ))
             
-            if cluster_created:
-                cluster.articles.set(cluster_articles)
-                clusters_created += 1
-                
-                if len(cluster_articles) > 5:
-                    TimelineEvent.objects.create(
-                        narrative=narrative,
-                        event_type='emergence',
-                        description=f"New narrative cluster emerged with {len(cluster_articles)} articles",
-                        event_date=timezone.now(),
-                        significance_score=len(cluster_articles) / 10.0
-                    )
-                
-                self.stdout.write(f"Created cluster: {narrative_name}")
+            if len(cluster_article_ids) > 5:
+                new_events.append(TimelineEvent(
+                    narrative=narrative,
+                    event_type='emergence',
+                    description=f"New narrative cluster emerged with {len(cluster_article_ids)} articles",
+                    event_date=timezone.now(),
+                    significance_score=len(cluster_article_ids) / 10.0
+                ))
+        
+        NarrativeCluster.objects.bulk_create([cluster for cluster, _ in new_clusters])
+        
+        ClusterArticle = NarrativeCluster.articles.through
+        ClusterArticle.objects.bulk_create([
+            ClusterArticle(narrativecluster_id=cluster.id, article_id=int(article_id))
+            for cluster, cluster_article_ids in new_clusters
+            for article_id in cluster_article_ids
+        ])
+        
+        TimelineEvent.objects.bulk_create(new_events)
+        
+        self.save_centroids(kmeans, run_started)
+        
+        for cluster, _ in new_clusters:
+            self.stdout.write(f"Created cluster: {cluster.narrative.name}")
+        
+        clusters_created = len(new_clusters)
         
         self.stdout.write(
             self.style.SUCCESS(f'Successfully created {clusters_created} narrative clusters')
@@ -1,16 +1,48 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from django.db.models import Count
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from sklearn.metrics import silhouette_score
+from scipy.stats import entropy
 import numpy as np
+import hashlib
 from datetime import datetime, timedelta
-from collections import Counter
-import math
-from langchain_google_genai import GoogleGenerativeAI
+from concurrent.futures import ThreadPoolExecutor
 from articles.models import Article
 from narratives.models import Statement, Narrative, NarrativeCluster, TimelineEvent
+from narratives.utils.embeddings import to_float32_matrix
+from narratives.utils.llm_client import get_llm
+
+# Above this many statements, MiniBatchKMeans is used even without --minibatch
+MINIBATCH_THRESHOLD = 5000
+
+# Concurrent cluster-naming LLM requests
+LLM_MAX_WORKERS = 8
+
+# Statements per cluster whose text is loaded for naming and descriptions
+NAME_SAMPLE_SIZE = 5
+
+# How long an LLM-generated name is reused for a cluster with the same statements
+NAME_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Built once at import; only the sample statements are substituted per call
+NAME_PROMPT = """Analyze the following news statements and identify the main narrative theme. Generate a concise, descriptive name (2-4 words) that captures the core story or topic:
+
+Statements:
+{statements}
+
+Instructions:
+- Create a journalistic, descriptive name
+- Keep it concise (2-4 words maximum)  
+- Focus on the main theme, event, or topic
+- Use title case (e.g., "Climate Policy Debate", "Tech Regulation Update")
+- Do not include dates or numbers
+- Respond with ONLY the narrative name, nothing else
+
+Narrative name:"""
 
 
 class Command(BaseCommand):
@@ -22,109 +54,94 @@ class Command(BaseCommand):
         parser.add_argument('--min-sources', type=int, default=3, help='Minimum unique sources required')
         parser.add_argument('--min-statements', type=int, default=5, help='Minimum statements per narrative')
         parser.add_argument('--coherence-threshold', type=float, default=0.6, help='Minimum coherence score')
+        parser.add_argument('--minibatch', action='store_true', help='Cluster with MiniBatchKMeans (default for large sets)')
+        parser.add_argument('--verbose-metrics', action='store_true', help='Log the (sampled) silhouette score')
     
-    def calculate_source_diversity(self, statements):
-        """Calculate source diversity using entropy."""
-        if not statements:
-            return 0.0
-        
-        # Count statements per source
-        sources = [stmt.article.source for stmt in statements]
-        source_counts = Counter(sources)
-        
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._mask_buffer = None  # Reused across clusters by _pairwise_stats
+    
+    def calculate_source_diversity(self, source_counts):
+        """Calculate source diversity using entropy of per-source statement counts."""
         if len(source_counts) <= 1:
             return 0.0
         
-        # Calculate entropy
-        total = len(sources)
-        entropy = 0.0
-        for count in source_counts.values():
-            p = count / total
-            if p > 0:
-                entropy -= p * math.log2(p)
-        
         # Normalize by maximum possible entropy
-        max_entropy = math.log2(len(source_counts))
-        return entropy / max_entropy if max_entropy > 0 else 0.0
+        return float(entropy(source_counts, base=2) / np.log2(len(source_counts)))
     
-    def calculate_coherence_score(self, embeddings):
-        """Calculate average cosine similarity within cluster."""
-        if len(embeddings) < 2:
-            return 0.0
-        
-        from sklearn.metrics.pairwise import cosine_similarity
-        
-        similarities = []
-        embeddings_array = np.array(embeddings)
-        
-        for i in range(len(embeddings)):
-            for j in range(i + 1, len(embeddings)):
-                sim = cosine_similarity([embeddings_array[i]], [embeddings_array[j]])[0][0]
-                similarities.append(sim)
-        
-        return np.mean(similarities) if similarities else 0.0
+    def _normalize(self, embeddings_array):
+        """L2-normalize embedding rows."""
+        norms = np.linalg.norm(embeddings_array, axis=1, keepdims=True)
+        return embeddings_array / np.maximum(norms, 1e-12)
     
-    def calculate_near_duplicate_rate(self, statements):
-        """Calculate rate of near-duplicate statements."""
-        if len(statements) < 2:
-            return 0.0
+    def _pairwise_stats(self, embeddings, normalized=False):
+        """
+        Return (coherence, near-duplicate rate) from one normalized similarity matrix.
         
-        from sklearn.metrics.pairwise import cosine_similarity
-        
-        embeddings = [stmt.embedding for stmt in statements if stmt.embedding is not None]
+        Pass normalized=True when embeddings are already L2-normalized float32 rows.
+        """
         if len(embeddings) < 2:
-            return 0.0
+            return 0.0, 0.0
         
-        embeddings_array = np.array(embeddings)
-        similarities = cosine_similarity(embeddings_array)
+        if not normalized:
+            embeddings = self._normalize(to_float32_matrix(embeddings))
+        similarities = embeddings @ embeddings.T
+        n = len(similarities)
+        total_pairs = n * (n - 1) // 2
         
-        # Count pairs with similarity > 0.95 (excluding diagonal)
-        high_similarity_count = 0
-        total_pairs = 0
+        # Off-diagonal mean: the matrix is symmetric, so no triangle indices are needed
+        coherence = float((similarities.sum() - np.trace(similarities)) / (2 * total_pairs))
         
-        for i in range(len(similarities)):
-            for j in range(i + 1, len(similarities)):
-                if similarities[i][j] > 0.95:
-                    high_similarity_count += 1
-                total_pairs += 1
+        # Threshold into a reused bool buffer and count; drop the diagonal and halve for pairs
+        if self._mask_buffer is None or len(self._mask_buffer) < n:
+            self._mask_buffer = np.empty((n, n), dtype=bool)
+        mask = np.greater(similarities, 0.95, out=self._mask_buffer[:n, :n])
+        duplicate_pairs = (np.count_nonzero(mask) - np.count_nonzero(mask.diagonal())) // 2
         
-        return high_similarity_count / total_pairs if total_pairs > 0 else 0.0
+        near_duplicate_rate = duplicate_pairs / total_pairs
+        return coherence, near_duplicate_rate
     
-    def generate_narrative_name(self, cluster_statements, cluster_id):
+    def name_cache_key(self, statement_ids):
+        """
+        Cache key for a cluster's membership.
+        
+        Reruns that produce exactly the same cluster (e.g. no new statements
+        since the last run) reuse its name; any membership change is a miss.
+        """
+        members = np.sort(np.asarray(statement_ids, dtype=np.int64))
+        return f"narrative_name:{hashlib.sha256(members.tobytes()).hexdigest()}"
+    
+    def generate_narrative_name(self, cluster_statements, cluster_id, statement_ids=None):
         """Generate meaningful narrative name from clustered statements."""
         api_key = settings.GOOGLE_API_KEY
         if not api_key:
             return f"Statement Cluster {timezone.now().strftime('%Y%m%d')} - {cluster_id}"
         
+        # Reuse the name generated for the same cluster on a recent run
+        cache_key = self.name_cache_key(statement_ids) if statement_ids else None
+        if cache_key:
+            cached_name = cache.get(cache_key)
+            if cached_name:
+                return cached_name
+        
         try:
-            llm = GoogleGenerativeAI(model="gemini-2.5-flash-lite", google_api_key=api_key)
+            llm = get_llm("gemini-2.5-flash-lite", api_key)
             
             # Use full statements for better context
             statements_text = []
-            for stmt in cluster_statements[:5]:  # Use up to 5 statements
+            for stmt in cluster_statements[:NAME_SAMPLE_SIZE]:
                 statements_text.append(f"- {stmt.full_statement[:200]}...")
             
-            statements_str = "\\n".join(statements_text)
+            statements_str = "\n".join(statements_text)
             
-            prompt = f"""Analyze the following news statements and identify the main narrative theme. Generate a concise, descriptive name (2-4 words) that captures the core story or topic:
-
-Statements:
-{statements_str}
-
-Instructions:
-- Create a journalistic, descriptive name
-- Keep it concise (2-4 words maximum)  
-- Focus on the main theme, event, or topic
-- Use title case (e.g., "Climate Policy Debate", "Tech Regulation Update")
-- Do not include dates or numbers
-- Respond with ONLY the narrative name, nothing else
-
-Narrative name:"""
+            prompt = NAME_PROMPT.format(statements=statements_str)
             
             response = llm.invoke(prompt)
             narrative_name = response.strip().replace('"', '').replace("'", "")
             
             if len(narrative_name.split()) <= 6 and len(narrative_name) <= 50:
+                if cache_key:
+                    cache.set(cache_key, narrative_name, NAME_CACHE_TIMEOUT)
                 return narrative_name
             else:
                 return f"Statement Cluster {timezone.now().strftime('%Y%m%d')} - {cluster_id}"
@@ -149,129 +166,243 @@ Narrative name:"""
             article__published_date__gte=cutoff_date,
             embedding__isnull=False,
             confidence_score__gte=0.5  # Only use high-confidence statements
-        ).select_related('article')
+        )
+        
+        total_statements = recent_statements.count()
         
-        if recent_statements.count() < n_clusters:
+        if total_statements < n_clusters:
             self.stdout.write(
-                self.style.ERROR(f"Not enough statements with embeddings found. Found: {recent_statements.count()}, need at least: {n_clusters}")
+                self.style.ERROR(f"Not enough statements with embeddings found. Found: {total_statements}, need at least: {n_clusters}")
             )
             return
         
-        self.stdout.write(f"Found {recent_statements.count()} statements to cluster")
+        # Stream only the clustering columns into preallocated per-statement buffers
+        statement_ids = np.empty(total_statements, dtype=np.int64)
+        article_ids = np.empty(total_statements, dtype=np.int64)
+        sources = np.empty(total_statements, dtype=object)
+        dates = np.empty(total_statements, dtype='datetime64[D]')
+        embeddings_array = None
         
-        # Extract embeddings
-        embeddings = []
-        statements = list(recent_statements)
+        row_count = 0
+        rows = recent_statements.values_list(
+            'id', 'article_id', 'article__source', 'article__published_date', 'embedding'
+        ).iterator(chunk_size=2000)
+        for statement_id, article_id, source, published_date, embedding in rows:
+            if row_count == total_statements:
+                break  # Statements added since the count
+            if embeddings_array is None:
+                embeddings_array = np.empty((total_statements, len(embedding)), dtype=np.float32)
+            statement_ids[row_count] = statement_id
+            article_ids[row_count] = article_id
+            sources[row_count] = source
+            dates[row_count] = published_date.date()
+            embeddings_array[row_count] = embedding
+            row_count += 1
         
-        for statement in statements:
-            if statement.embedding is not None:
-                embeddings.append(statement.embedding)
+        if row_count < n_clusters:
+            self.stdout.write(
+                self.style.ERROR(f"Not enough statements with embeddings found. Found: {row_count}, need at least: {n_clusters}")
+            )
+            return
+        
+        statement_ids = statement_ids[:row_count]
+        article_ids = article_ids[:row_count]
+        sources = sources[:row_count]
+        dates = dates[:row_count]
+        embeddings_array = embeddings_array[:row_count]
         
-        embeddings_array = np.array(embeddings)
+        self.stdout.write(f"Found {row_count} statements to cluster")
         
-        # Perform clustering
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-        cluster_labels = kmeans.fit_predict(embeddings_array)
+        normalized_embeddings = self._normalize(embeddings_array)
+        
+        # Perform clustering on normalized rows, so Euclidean distance tracks cosine (spherical k-means)
+        if options['minibatch'] or row_count > MINIBATCH_THRESHOLD:
+            kmeans = MiniBatchKMeans(
+                n_clusters=n_clusters, random_state=42, n_init=5,
+                batch_size=1024, reassignment_ratio=0.01
+            )
+        else:
+            kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
+        cluster_labels = kmeans.fit_predict(normalized_embeddings)
         
-        # Calculate overall silhouette score
-        if len(embeddings_array) > n_clusters:
-            silhouette_avg = silhouette_score(embeddings_array, cluster_labels)
+        # Calculate overall silhouette score (logging only)
+        if options['verbose_metrics'] and len(embeddings_array) > n_clusters:
+            silhouette_avg = silhouette_score(
+                embeddings_array, cluster_labels, metric='cosine',
+                sample_size=min(2000, len(embeddings_array)), random_state=42
+            )
             self.stdout.write(f"Average silhouette score: {silhouette_avg:.3f}")
         
-        narratives_created = 0
+        centroids_list = kmeans.cluster_centers_.astype(np.float32).tolist()
         
-        # Process each cluster
+        # Filter clusters by quality before spending LLM calls on them
+        candidates = []
         for cluster_id in range(n_clusters):
             cluster_indices = np.where(cluster_labels == cluster_id)[0]
-            cluster_statements = [statements[i] for i in cluster_indices]
             
-            if len(cluster_statements) < min_statements:
-                self.stdout.write(f"Cluster {cluster_id}: Too few statements ({len(cluster_statements)} < {min_statements})")
+            if len(cluster_indices) < min_statements:
+                self.stdout.write(f"Cluster {cluster_id}: Too few statements ({len(cluster_indices)} < {min_statements})")
                 continue
             
             # Check source diversity
-            unique_sources = set(stmt.article.source for stmt in cluster_statements)
+            unique_sources, source_counts = np.unique(sources[cluster_indices], return_counts=True)
             if len(unique_sources) < min_sources:
                 self.stdout.write(f"Cluster {cluster_id}: Not enough unique sources ({len(unique_sources)} < {min_sources})")
                 continue
             
             # Check date diversity (at least 2 different dates)
-            unique_dates = set(stmt.article.published_date.date() for stmt in cluster_statements)
+            unique_dates = np.unique(dates[cluster_indices])
             if len(unique_dates) < 2:
                 self.stdout.write(f"Cluster {cluster_id}: Not enough temporal spread ({len(unique_dates)} days)")
                 continue
             
             # Calculate quality metrics
-            cluster_embeddings = [embeddings[i] for i in cluster_indices]
-            coherence_score = self.calculate_coherence_score(cluster_embeddings)
+            coherence_score, near_duplicate_rate = self._pairwise_stats(
+                normalized_embeddings[cluster_indices], normalized=True
+            )
             
             if coherence_score < coherence_threshold:
                 self.stdout.write(f"Cluster {cluster_id}: Low coherence score ({coherence_score:.3f} < {coherence_threshold})")
                 continue
             
-            source_diversity = self.calculate_source_diversity(cluster_statements)
-            near_duplicate_rate = self.calculate_near_duplicate_rate(cluster_statements)
-            
-            # Generate narrative name
-            narrative_name = self.generate_narrative_name(cluster_statements, cluster_id)
+            source_diversity = self.calculate_source_diversity(source_counts)
             
-            # Create description
-            sample_statements = [stmt.full_statement[:100] for stmt in cluster_statements[:3]]
-            description = f"Narrative with {len(cluster_statements)} statements from {len(unique_sources)} sources. Sample statements: {' | '.join(sample_statements)}"
-            
-            # Create or update narrative
-            narrative, created = Narrative.objects.get_or_create(
-                name=narrative_name,
-                defaults={
-                    'description': description,
-                    'source_diversity_score': source_diversity,
-                    'support_count': len(cluster_statements),
-                    'unique_sources_count': len(unique_sources),
-                    'coherence_score': coherence_score,
-                    'near_duplicate_rate': near_duplicate_rate,
-                    'persistence_days': len(unique_dates)
-                }
-            )
+            candidates.append({
+                'cluster_id': cluster_id,
+                'statement_ids': statement_ids[cluster_indices].tolist(),
+                'article_ids': list(dict.fromkeys(article_ids[cluster_indices].tolist())),
+                'unique_sources': unique_sources,
+                'unique_dates': unique_dates,
+                'coherence_score': coherence_score,
+                'near_duplicate_rate': near_duplicate_rate,
+                'source_diversity': source_diversity,
+            })
+        
+        # Re-fetch statement text only for the samples used in names and descriptions
+        sample_ids = [
+            statement_id for candidate in candidates
+            for statement_id in candidate['statement_ids'][:NAME_SAMPLE_SIZE]
+        ]
+        samples_by_id = Statement.objects.only('id', 'full_statement').in_bulk(sample_ids)
+        for candidate in candidates:
+            candidate['samples'] = [
+                samples_by_id[statement_id]
+                for statement_id in candidate['statement_ids'][:NAME_SAMPLE_SIZE]
+                if statement_id in samples_by_id
+            ]
+        
+        # Generate narrative names; the LLM calls are independent, so they run concurrently
+        with ThreadPoolExecutor(max_workers=LLM_MAX_WORKERS) as executor:
+            narrative_names = list(executor.map(
+                lambda candidate: self.generate_narrative_name(
+                    candidate['samples'], candidate['cluster_id'],
+                    statement_ids=candidate['statement_ids']
+                ),
+                candidates
+            ))
+        
+        # Look up existing narratives in one query; new ones are created in bulk below
+        narratives_by_name = {}
+        for narrative in Narrative.objects.filter(name__in=set(narrative_names)):
+            narratives_by_name.setdefault(narrative.name, narrative)
+        
+        metric_fields = [
+            'source_diversity_score', 'support_count', 'unique_sources_count',
+            'coherence_score', 'near_duplicate_rate', 'persistence_days'
+        ]
+        new_narratives = {}
+        updated_narratives = {}
+        new_clusters = []
+        new_events = []
+        now = timezone.now()
+        
+        for candidate, narrative_name in zip(candidates, narrative_names):
+            cluster_id = candidate['cluster_id']
+            statement_count = len(candidate['statement_ids'])
+            article_ids = candidate['article_ids']
+            coherence_score = candidate['coherence_score']
+            source_diversity = candidate['source_diversity']
+            metrics = {
+                'source_diversity_score': source_diversity,
+                'support_count': statement_count,
+                'unique_sources_count': len(candidate['unique_sources']),
+                'coherence_score': coherence_score,
+                'near_duplicate_rate': candidate['near_duplicate_rate'],
+                'persistence_days': len(candidate['unique_dates'])
+            }
             
-            if not created:
+            narrative = narratives_by_name.get(narrative_name) or new_narratives.get(narrative_name)
+            if narrative is None:
+                # Create description
+                sample_statements = [stmt.full_statement[:100] for stmt in candidate['samples'][:3]]
+                description = f"Narrative with {statement_count} statements from {len(candidate['unique_sources'])} sources. Sample statements: {' | '.join(sample_statements)}"
+                narrative = Narrative(name=narrative_name, description=description, **metrics)
+                new_narratives[narrative_name] = narrative
+            else:
                 # Update metrics for existing narrative
-                narrative.source_diversity_score = source_diversity
-                narrative.support_count = len(cluster_statements)
-                narrative.unique_sources_count = len(unique_sources)
-                narrative.coherence_score = coherence_score
-                narrative.near_duplicate_rate = near_duplicate_rate
-                narrative.persistence_days = len(unique_dates)
-                narrative.save()
+                for field, value in metrics.items():
+                    setattr(narrative, field, value)
+                if narrative_name in narratives_by_name:
+                    updated_narratives[narrative.pk] = narrative
             
-            # Create narrative cluster
-            cluster = NarrativeCluster.objects.create(
-                narrative=narrative,
-                cluster_date=timezone.now().date(),
-                centroid=kmeans.cluster_centers_[cluster_id].tolist()
-            )
+            new_clusters.append((
+                NarrativeCluster(
+                    narrative=narrative,
+                    cluster_date=now.date(),
+                    centroid=centroids_list[cluster_id]
+                ),
+                candidate['statement_ids'],
+                article_ids
+            ))
+            
+            new_events.append((
+                TimelineEvent(
+                    narrative=narrative,
+                    event_type='emergence',
+                    description=f"Narrative detected with {statement_count} statements (coherence: {coherence_score:.3f}, diversity: {source_diversity:.3f})",
+                    event_date=now,
+                    significance_score=coherence_score * source_diversity
+                ),
+                article_ids[:5]  # Add first 5 articles
+            ))
+        
+        with transaction.atomic():
+            Narrative.objects.bulk_create(new_narratives.values())
+            Narrative.objects.bulk_update(updated_narratives.values(), metric_fields)
             
-            # Add statements and articles to cluster
-            cluster.statements.add(*cluster_statements)
-            articles = list(set(stmt.article for stmt in cluster_statements))
-            cluster.articles.add(*articles)
+            NarrativeCluster.objects.bulk_create([cluster for cluster, _, _ in new_clusters])
+            TimelineEvent.objects.bulk_create([event for event, _ in new_events])
             
-            # Create timeline event
-            TimelineEvent.objects.create(
-                narrative=narrative,
-                event_type='emergence',
-                description=f"Narrative detected with {len(cluster_statements)} statements (coherence: {coherence_score:.3f}, diversity: {source_diversity:.3f})",
-                event_date=timezone.now(),
-                significance_score=coherence_score * source_diversity,
-                related_articles=articles[:5]  # Add first 5 articles
-            )
+            # Add statements and articles to clusters and events
+            ClusterStatement = NarrativeCluster.statements.through
+            ClusterStatement.objects.bulk_create([
+                ClusterStatement(narrativecluster_id=cluster.id, statement_id=statement_id)
+                for cluster, statement_ids, _ in new_clusters
+                for statement_id in statement_ids
+            ])
             
-            narratives_created += 1
+            ClusterArticle = NarrativeCluster.articles.through
+            ClusterArticle.objects.bulk_create([
+                ClusterArticle(narrativecluster_id=cluster.id, article_id=article_id)
+                for cluster, _, article_ids in new_clusters
+                for article_id in article_ids
+            ])
             
+            EventArticle = TimelineEvent.related_articles.through
+            EventArticle.objects.bulk_create([
+                EventArticle(timelineevent_id=event.id, article_id=article_id)
+                for event, article_ids in new_events
+                for article_id in article_ids
+            ])
+        
+        narratives_created = len(candidates)
+        
+        for candidate, narrative_name in zip(candidates, narrative_names):
             self.stdout.write(
                 self.style.SUCCESS(
-                    f"Created narrative '{narrative_name}': {len(cluster_statements)} statements, "
-                    f"{len(unique_sources)} sources, coherence: {coherence_score:.3f}, "
-                    f"diversity: {source_diversity:.3f}, duplicates: {near_duplicate_rate:.3f}"
+                    f"Created narrative '{narrative_name}': {len(candidate['statement_ids'])} statements, "
+                    f"{len(candidate['unique_sources'])} sources, coherence: {candidate['coherence_score']:.3f}, "
+                    f"diversity: {candidate['source_diversity']:.3f}, duplicates: {candidate['near_duplicate_rate']:.3f}"
                 )
             )
         
@@ -1,39 +1,25 @@
 from django.core.management.base import BaseCommand
 from django.conf import settings
+from django.db import DatabaseError, transaction
 from django.utils import timezone
-from langchain_google_genai import GoogleGenerativeAI
 import json
 import time
+from string import Template
+from concurrent.futures import ThreadPoolExecutor
 from articles.models import Article
 from narratives.models import Statement
+from narratives.utils.llm_client import get_llm
+from narratives.utils.rate_limit import RateLimiter
 
+# Attempts per article before giving up on the LLM call
+LLM_MAX_RETRIES = 3
 
-class Command(BaseCommand):
-    help = 'Extract statements from articles using LLM (who → what → why → consequence format)'
-    
-    def add_arguments(self, parser):
-        parser.add_argument('--batch-size', type=int, default=5, help='Number of articles to process at once')
-        parser.add_argument('--limit', type=int, help='Maximum number of articles to process')
-        parser.add_argument('--skip-existing', action='store_true', help='Skip articles that already have statements')
-    
-    def extract_statements_from_article(self, article):
-        """Extract structured statements from article using LLM."""
-        api_key = settings.GOOGLE_API_KEY
-        if not api_key:
-            self.stdout.write(
-                self.style.ERROR("GOOGLE_API_KEY not configured")
-            )
-            return []
-        
-        try:
-            llm = GoogleGenerativeAI(model="gemini-2.5-flash-lite", google_api_key=api_key)
-            
-            # Create prompt for statement extraction
-            prompt = f"""Analyze the following news article and extract key statements in the format: WHO → WHAT → WHY → CONSEQUENCE.
+# Built once at import; only the article fields are substituted per call
+EXTRACTION_PROMPT = Template("""Analyze the following news article and extract key statements in the format: WHO → WHAT → WHY → CONSEQUENCE.
 
-Article Title: {article.title}
-Article Content: {article.content[:3000]}  # Limit content length
-Source: {article.source}
+Article Title: $title
+Article Content: $content
+Source: $source
 
 Instructions:
 1. Extract 1-3 most important statements/claims from the article
@@ -45,14 +31,14 @@ Instructions:
 
 3. Return ONLY a JSON array with this exact structure:
 [
-  {{
+  {
     "actor": "WHO - clear identification of the actor",
     "action": "WHAT - the main action/statement/event",
     "reason": "WHY - reasoning or cause (empty string if not mentioned)",
     "consequence": "CONSEQUENCE - expected outcome (empty string if not mentioned)",
     "full_statement": "Complete extracted statement in natural language",
     "confidence": 0.8
-  }}
+  }
 ]
 
 Requirements:
@@ -63,35 +49,100 @@ Requirements:
 - Return empty array if no clear statements found
 - Ensure valid JSON format
 
-JSON Response:"""
+JSON Response:""")
+
 
-            response = llm.invoke(prompt)
+class Command(BaseCommand):
+    help = 'Extract statements from articles using LLM (who → what → why → consequence format)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5, help='Number of articles to process at once')
+        parser.add_argument('--limit', type=int, help='Maximum number of articles to process')
+        parser.add_argument('--skip-existing', action='store_true', help='Skip articles that already have statements')
+        parser.add_argument('--concurrency', type=int, default=5, help='Number of concurrent LLM requests')
+        parser.add_argument('--qpm', type=int, default=120, help='Maximum LLM requests per minute')
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rate_limiter = RateLimiter(0)
+    
+    def invoke_with_retry(self, llm, prompt):
+        """Invoke the LLM within the rate limit, retrying with exponential backoff."""
+        for attempt in range(LLM_MAX_RETRIES):
+            self.rate_limiter.wait()
+            try:
+                return llm.invoke(prompt)
+            except Exception:
+                if attempt == LLM_MAX_RETRIES - 1:
+                    raise
+                time.sleep(2 ** attempt)
+    
+    def parse_statements_json(self, text):
+        """
+        Parse the statement array out of an LLM response, tolerating extra text.
+        
+        Decodes the first JSON array found (ignoring markdown fences or trailing
+        commentary). If the array itself is malformed, salvages the well-formed
+        objects inside it. Returns None when nothing can be recovered.
+        """
+        decoder = json.JSONDecoder()
+        start = text.find('[')
+        if start == -1:
+            return None
+        
+        try:
+            data, _ = decoder.raw_decode(text, start)
+            if isinstance(data, list):
+                return data
+        except json.JSONDecodeError:
+            pass
+        
+        # Salvage complete objects one by one from a truncated or broken array
+        statements = []
+        position = text.find('{', start)
+        while position != -1:
+            try:
+                item, end = decoder.raw_decode(text, position)
+            except json.JSONDecodeError:
+                position = text.find('{', position + 1)
+                continue
+            if isinstance(item, dict):
+                statements.append(item)
+            position = text.find('{', end)
+        
+        return statements or None
+    
+    def extract_statements_from_article(self, article):
+        """Extract structured statements from article using LLM."""
+        api_key = settings.GOOGLE_API_KEY
+        if not api_key:
+            self.stdout.write(
+                self.style.ERROR("GOOGLE_API_KEY not configured")
+            )
+            return []
+        
+        try:
+            llm = get_llm("gemini-2.5-flash-lite", api_key)
+            
+            # Create prompt for statement extraction
+            prompt = EXTRACTION_PROMPT.substitute(
+                title=article.title,
+                content=article.content[:3000],
+                source=article.source
+            )
+
+            response = self.invoke_with_retry(llm, prompt)
             
             # Parse JSON response
-            try:
-                # Clean response and extract JSON
-                json_text = response.strip()
-                if json_text.startswith('```json'):
-                    json_text = json_text[7:]
-                if json_text.endswith('```'):
-                    json_text = json_text[:-3]
-                
-                statements_data = json.loads(json_text.strip())
-                
-                if not isinstance(statements_data, list):
-                    self.stdout.write(
-                        self.style.WARNING(f"Invalid JSON format for article {article.id}")
-                    )
-                    return []
-                
-                return statements_data
-                
-            except json.JSONDecodeError as e:
+            statements_data = self.parse_statements_json(response)
+            if statements_data is None:
                 self.stdout.write(
-                    self.style.WARNING(f"JSON parsing error for article {article.id}: {str(e)}")
+                    self.style.WARNING(f"JSON parsing error for article {article.id}")
                 )
                 self.stdout.write(f"Raw response: {response[:200]}...")
                 return []
+            
+            return statements_data
                 
         except Exception as e:
             self.stdout.write(
@@ -99,9 +150,9 @@ JSON Response:"""
             )
             return []
     
-    def save_statements(self, article, statements_data):
-        """Save extracted statements to database."""
-        saved_count = 0
+    def build_statements(self, article, statements_data):
+        """Build unsaved Statement objects from extracted data, skipping invalid entries."""
+        statements = []
         
         for stmt_data in statements_data:
             try:
@@ -109,24 +160,56 @@ JSON Response:"""
                 if not stmt_data.get('actor') or not stmt_data.get('action'):
                     continue
                 
-                statement = Statement(
+                # The LLM may send explicit nulls; the text columns are NOT NULL
+                statements.append(Statement(
                     article=article,
-                    actor=stmt_data.get('actor', '')[:300],  # Truncate if too long
-                    action=stmt_data.get('action', ''),
-                    reason=stmt_data.get('reason', ''),
-                    consequence=stmt_data.get('consequence', ''),
-                    full_statement=stmt_data.get('full_statement', ''),
-                    confidence_score=float(stmt_data.get('confidence', 0.0))
-                )
-                statement.save()
-                saved_count += 1
+                    actor=stmt_data['actor'][:300],  # Truncate if too long
+                    action=stmt_data['action'],
+                    reason=stmt_data.get('reason') or '',
+                    consequence=stmt_data.get('consequence') or '',
+                    full_statement=stmt_data.get('full_statement') or '',
+                    confidence_score=float(stmt_data.get('confidence') or 0.0)
+                ))
                 
             except Exception as e:
                 self.stdout.write(
-                    self.style.WARNING(f"Failed to save statement: {str(e)}")
+                    self.style.WARNING(f"Skipping invalid statement: {str(e)}")
+                )
+        
+        return statements
+    
+    def save_batch(self, statements_by_article):
+        """
+        Save a batch's statements in one transaction, falling back to one
+        transaction per article so a bad row doesn't discard the whole batch.
+        
+        Returns:
+            Number of statements saved
+        """
+        try:
+            with transaction.atomic():
+                Statement.objects.bulk_create(
+                    [stmt for _, statements in statements_by_article for stmt in statements],
+                    batch_size=500
+                )
+            return sum(len(statements) for _, statements in statements_by_article)
+        except DatabaseError as e:
+            self.stdout.write(
+                self.style.WARNING(f"Batch insert failed, saving articles one by one: {str(e)}")
+            )
+        
+        saved = 0
+        for article, statements in statements_by_article:
+            try:
+                with transaction.atomic():
+                    Statement.objects.bulk_create(statements, batch_size=500)
+                saved += len(statements)
+            except DatabaseError as e:
+                self.stdout.write(
+                    self.style.ERROR(f"Failed to save statements for article {article.id}: {str(e)}")
                 )
         
-        return saved_count
+        return saved
     
     def handle(self, *args, **options):
         batch_size = options['batch_size']
@@ -154,33 +237,36 @@ JSON Response:"""
         processed = 0
         total_statements = 0
         
-        # Process articles in batches
-        for i in range(0, total_articles, batch_size):
-            batch = list(queryset[i:i + batch_size])
-            
-            for article in batch:
-                self.stdout.write(f"Processing article {processed + 1}/{total_articles}: {article.title[:50]}...")
+        # Requests are spaced to stay under --qpm across all workers
+        self.rate_limiter = RateLimiter(60.0 / options['qpm'] if options['qpm'] > 0 else 0)
+        
+        # Process articles in batches; LLM calls within a batch run concurrently
+        with ThreadPoolExecutor(max_workers=max(1, options['concurrency'])) as executor:
+            for i in range(0, total_articles, batch_size):
+                batch = list(queryset[i:i + batch_size])
                 
                 # Extract statements
-                statements_data = self.extract_statements_from_article(article)
+                results = executor.map(self.extract_statements_from_article, batch)
                 
-                if statements_data:
-                    # Save to database
-                    saved_count = self.save_statements(article, statements_data)
-                    total_statements += saved_count
+                statements_by_article = []
+                for article, statements_data in zip(batch, results):
+                    self.stdout.write(f"Processing article {processed + 1}/{total_articles}: {article.title[:50]}...")
                     
-                    self.stdout.write(
-                        self.style.SUCCESS(f"  → Extracted {saved_count} statements")
-                    )
-                else:
-                    self.stdout.write("  → No statements extracted")
+                    statements = self.build_statements(article, statements_data) if statements_data else []
+                    if statements:
+                        statements_by_article.append((article, statements))
+                        self.stdout.write(
+                            self.style.SUCCESS(f"  → Extracted {len(statements)} statements")
+                        )
+                    else:
+                        self.stdout.write("  → No statements extracted")
+                    
+                    processed += 1
                 
-                processed += 1
+                # Save the whole batch to database at once
+                total_statements += self.save_batch(statements_by_article)
                 
-                # Rate limiting - small delay between requests
-                time.sleep(0.5)
-            
-            self.stdout.write(f"Batch {i//batch_size + 1} completed. Total statements: {total_statements}")
+                self.stdout.write(f"Batch {i//batch_size + 1} completed. Total statements: {total_statements}")
         
         self.stdout.write(
             self.style.SUCCESS(
@@ -1,8 +1,14 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.conf import settings
+from django.db import connections
 from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from bisect import bisect_left
 from datetime import datetime, timedelta
+from decimal import Decimal
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import StringIO
 import numpy as np
 from articles.models import Article
 from narratives.models import Narrative, TimelineEvent
@@ -10,6 +16,43 @@ from narratives.management.commands.cost_efficient_clustering import Command as
 from narratives.utils.content_compression import ContentCompressor
 
 
+def _process_single_week(start_date: datetime, end_date: datetime, options: dict) -> dict:
+    """
+    Cluster one week and generate its brief.
+    
+    Runs in a worker process, so it builds its own clustering command and
+    returns only plain values the parent can aggregate.
+    """
+    # Never reuse a connection inherited from the parent; Django reconnects on demand
+    connections.close_all()
+    
+    # Buffer the week's log so the parent writes it in one piece instead of interleaving workers
+    log = StringIO()
+    clustering_command = ClusteringCommand(stdout=log)
+    # Ensure Ukrainian language support is initialized
+    clustering_command.compressor = ContentCompressor(language='uk')
+    
+    week_narratives = clustering_command.process_week_batch(
+        start_date, end_date,
+        options['clusters_per_week'],
+        options['min_sources'],
+        5,  # min_articles
+        options['coherence_threshold']
+    )
+    
+    # Generate weekly brief
+    brief = clustering_command.generate_weekly_brief(week_narratives) if week_narratives else ''
+    
+    llm_calls, cost = clustering_command.pop_counters()
+    return {
+        'narratives': len(week_narratives),
+        'llm_calls': llm_calls,
+        'cost': cost,
+        'brief': brief[:100],
+        'log': log.getvalue()
+    }
+
+
 class Command(BaseCommand):
     help = 'Process historical data for the past 2 months with cost optimization'
     
@@ -20,10 +63,15 @@ class Command(BaseCommand):
         parser.add_argument('--skip-existing', action='store_true', help='Skip weeks that already have narratives')
         parser.add_argument('--min-sources', type=int, default=3, help='Minimum sources per narrative')
         parser.add_argument('--coherence-threshold', type=float, default=0.5, help='Minimum coherence threshold')
+        parser.add_argument('--max-workers', type=int, default=4, help='Weeks processed in parallel (separate processes)')
     
-    def __init__(self):
-        super().__init__()
-        self.clustering_command = None
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Week stats keyed by (start, end); planning and processing ask for the same weeks
+        self._stats_cache = {}
+        self._stats_cache_hits = 0
+        # Days with timeline events, filled by load_processed_days
+        self._processed_days = None
     
     def get_week_boundaries(self, months_back: int):
         """Generate list of week boundaries for processing."""
@@ -40,8 +88,25 @@ class Command(BaseCommand):
         
         return weeks
     
+    def load_processed_days(self, weeks: list):
+        """Fetch the distinct days with timeline events across all weeks in one query."""
+        self._processed_days = sorted(
+            TimelineEvent.objects.filter(
+                event_date__gte=weeks[0][0],
+                event_date__lt=weeks[-1][1]
+            ).annotate(
+                # Week boundaries are midnights in their own timezone, so truncate in it too
+                day=TruncDate('event_date', tzinfo=weeks[0][0].tzinfo)
+            ).order_by().values_list('day', flat=True).distinct()
+        )
+    
     def check_week_processed(self, start_date: datetime, end_date: datetime) -> bool:
         """Check if week has already been processed."""
+        if self._processed_days is not None:
+            # Any event day in [start, end) marks the week as processed
+            position = bisect_left(self._processed_days, start_date.date())
+            return position < len(self._processed_days) and self._processed_days[position] < end_date.date()
+        
         existing_events = TimelineEvent.objects.filter(
             event_date__gte=start_date,
             event_date__lt=end_date
@@ -50,22 +115,34 @@ class Command(BaseCommand):
         return existing_events > 0
     
     def get_week_article_stats(self, start_date: datetime, end_date: datetime) -> dict:
-        """Get statistics for articles in date range."""
-        articles = Article.objects.filter(
+        """Get statistics for articles in date range, querying each range once."""
+        cached = self._stats_cache.get((start_date, end_date))
+        if cached is not None:
+            self._stats_cache_hits += 1
+            return cached
+        
+        stats = Article.objects.filter(
             published_date__gte=start_date,
             published_date__lt=end_date
+        ).aggregate(
+            total=Count('id'),
+            with_embeddings=Count('id', filter=Q(embedding__isnull=False)),
+            sources=Count('source', distinct=True)
         )
         
-        total_articles = articles.count()
-        articles_with_embeddings = articles.filter(embedding__isnull=False).count()
-        unique_sources = articles.values('source').distinct().count()
+        total_articles = stats['total']
+        articles_with_embeddings = stats['with_embeddings']
+        unique_sources = stats['sources']
         
-        return {
+        week_stats = {
             'total_articles': total_articles,
             'articles_with_embeddings': articles_with_embeddings,
             'unique_sources': unique_sources,
             'coverage': articles_with_embeddings / total_articles if total_articles > 0 else 0
         }
+        self._stats_cache[(start_date, end_date)] = week_stats
+        
+        return week_stats
     
     def estimate_processing_cost(self, weeks_to_process: list, clusters_per_week: int) -> dict:
         """Estimate processing cost for historical data."""
@@ -90,21 +167,17 @@ class Command(BaseCommand):
         }
     
     def process_historical_batch(self, weeks_to_process: list, options: dict) -> dict:
-        """Process historical weeks using the clustering command."""
-        
-        # Initialize clustering command with Ukrainian support
-        self.clustering_command = ClusteringCommand()
-        # Ensure Ukrainian language support is initialized
-        self.clustering_command.compressor = ContentCompressor(language='uk')
-        
+        """Process historical weeks in parallel worker processes using the clustering command."""
         results = {
             'weeks_processed': 0,
             'narratives_created': 0,
             'total_llm_calls': 0,
-            'total_cost': 0.0,
+            'total_cost': Decimal('0'),  # Exact sum over many small per-week costs
             'weeks_skipped': 0
         }
         
+        # Select the weeks to run here; workers only do the clustering
+        pending = []
         for i, (start_date, end_date) in enumerate(weeks_to_process, 1):
             week_str = f"Week {i}/{len(weeks_to_process)}: {start_date.date()} - {end_date.date()}"
             
@@ -129,35 +202,42 @@ class Command(BaseCommand):
                 f"🔄 {week_str} - {stats['articles_with_embeddings']} articles, "
                 f"{stats['unique_sources']} sources"
             )
+            pending.append((week_str, start_date, end_date))
+        
+        # Only plain clustering settings are sent to the workers
+        week_options = {
+            key: options[key]
+            for key in ('clusters_per_week', 'min_sources', 'coherence_threshold')
+        }
+        
+        # Forked workers must not share the parent's open database connections
+        connections.close_all()
+        
+        with ProcessPoolExecutor(max_workers=max(1, options['max_workers'])) as executor:
+            futures = {
+                executor.submit(_process_single_week, start_date, end_date, week_options): week_str
+                for week_str, start_date, end_date in pending
+            }
             
-            # Process using clustering command
-            try:
-                week_narratives = self.clustering_command.process_week_batch(
-                    start_date, end_date,
-                    options['clusters_per_week'],
-                    options['min_sources'],
-                    5,  # min_articles
-                    options['coherence_threshold']
-                )
+            for future in as_completed(futures):
+                week_str = futures[future]
+                try:
+                    week_result = future.result()
+                except Exception as e:
+                    self.stdout.write(
+                        self.style.ERROR(f"❌ {week_str} - Processing failed: {str(e)}")
+                    )
+                    continue
                 
-                # Generate weekly brief
-                if week_narratives:
-                    brief = self.clustering_command.generate_weekly_brief(week_narratives)
-                    self.stdout.write(f"   📋 Brief: {brief[:100]}...")
+                lines = [f"✅ {week_str}", week_result['log'].rstrip('\n')]
+                if week_result['brief']:
+                    lines.append(f"   📋 Brief: {week_result['brief']}...")
+                self.stdout.write('\n'.join(line for line in lines if line))
                 
                 results['weeks_processed'] += 1
-                results['narratives_created'] += len(week_narratives)
-                results['total_llm_calls'] += self.clustering_command.llm_calls
-                results['total_cost'] += self.clustering_command.total_cost
-                
-                # Reset counters for next week
-                self.clustering_command.llm_calls = 0
-                self.clustering_command.total_cost = 0.0
-                
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f"❌ {week_str} - Processing failed: {str(e)}")
-                )
+                results['narratives_created'] += week_result['narratives']
+                results['total_llm_calls'] += week_result['llm_calls']
+                results['total_cost'] += Decimal(str(week_result['cost']))
         
         return results
     
@@ -173,6 +253,8 @@ class Command(BaseCommand):
         
         # Get week boundaries
         weeks = self.get_week_boundaries(months)
+        if skip_existing and weeks:
+            self.load_processed_days(weeks)
         self.stdout.write(f"Found {len(weeks)} weeks to potentially process")
         
         # Filter weeks that need processing
@@ -232,8 +314,11 @@ class Command(BaseCommand):
         self.stdout.write(f"📰 Narratives created: {results['narratives_created']}")
         self.stdout.write(f"🤖 LLM calls made: {results['total_llm_calls']}")
         self.stdout.write(f"💵 Total cost: ${results['total_cost']:.3f}")
+        self.stdout.write(
+            f"🗄️  Stats cache: hits={self._stats_cache_hits}, misses={len(self._stats_cache)}"
+        )
         
-        if results['total_cost'] > 0:
+        if results['total_cost'] > 0 and results['narratives_created'] > 0:
             cost_per_narrative = results['total_cost'] / results['narratives_created']
             self.stdout.write(f"📈 Cost per narrative: ${cost_per_narrative:.4f}")
         
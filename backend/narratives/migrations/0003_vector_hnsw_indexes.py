@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-14 04:38
+
+from django.db import migrations
+import pgvector.django.indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('narratives', '0002_narrative_coherence_score_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='narrativecluster',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['centroid'], m=16, name='cluster_centroid_hnsw', opclasses=['vector_cosine_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='statement',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedding'], m=16, name='statement_embedding_hnsw', opclasses=['vector_cosine_ops']),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-14 04:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('narratives', '0003_vector_hnsw_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timelineevent',
+            index=models.Index(fields=['event_date'], name='timeline_evt_date_idx'),
+        ),
+    ]
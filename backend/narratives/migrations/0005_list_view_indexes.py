@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-14 04:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('narratives', '0004_timeline_evt_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='narrative',
+            index=models.Index(condition=models.Q(('is_active', True), ('support_count__gt', 0)), fields=['-support_count', '-created_at'], name='narr_active_supp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineevent',
+            index=models.Index(fields=['-significance_score', '-event_date'], name='te_sig_date_idx'),
+        ),
+    ]
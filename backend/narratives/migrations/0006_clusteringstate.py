@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-14 05:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('narratives', '0005_list_view_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClusteringState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('centroids', models.JSONField(help_text='All k-means cluster centers, one list per cluster')),
+                ('last_run_at', models.DateTimeField(help_text='Start of the run that produced the centroids')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
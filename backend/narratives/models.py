@@ -1,5 +1,5 @@
 from django.db import models
-from pgvector.django import VectorField
+from pgvector.django import HnswIndex, VectorField
 
 
 class Statement(models.Model):
@@ -26,6 +26,13 @@ class Statement(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Cosine nearest-neighbour lookups (statement -> similar statements/clusters)
+            HnswIndex(
+                name='statement_embedding_hnsw', fields=['embedding'],
+                m=16, ef_construction=64, opclasses=['vector_cosine_ops']
+            ),
+        ]
     
     def __str__(self):
         return f"{self.actor}: {self.action[:50]}..."
@@ -45,6 +52,15 @@ class Narrative(models.Model):
     near_duplicate_rate = models.FloatField(default=0.0, help_text="Rate of near-duplicate content")
     persistence_days = models.IntegerField(default=0, help_text="Number of days narrative persisted")
     
+    class Meta:
+        indexes = [
+            # NarrativeListView: active, supported narratives in ordering order
+            models.Index(
+                fields=['-support_count', '-created_at'], name='narr_active_supp_idx',
+                condition=models.Q(is_active=True, support_count__gt=0)
+            ),
+        ]
+    
     def __str__(self):
         return self.name
 
@@ -59,6 +75,13 @@ class NarrativeCluster(models.Model):
     
     class Meta:
         ordering = ['-cluster_date']
+        indexes = [
+            # Cosine nearest-neighbour lookups (article/statement -> closest cluster)
+            HnswIndex(
+                name='cluster_centroid_hnsw', fields=['centroid'],
+                m=16, ef_construction=64, opclasses=['vector_cosine_ops']
+            ),
+        ]
 
 
 class TimelineEvent(models.Model):
@@ -78,6 +101,26 @@ class TimelineEvent(models.Model):
     
     class Meta:
         ordering = ['-event_date']
+        indexes = [
+            # Week-range checks in process_historical_data and the default ordering
+            models.Index(fields=['event_date'], name='timeline_evt_date_idx'),
+            # TimelineView ordering
+            models.Index(fields=['-significance_score', '-event_date'], name='te_sig_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.narrative.name} - {self.get_event_type_display()}"
+
+
+class ClusteringState(models.Model):
+    """
+    Last k-means run of a clustering command, kept to warm-start the next run.
+    One row per command, looked up by key.
+    """
+    key = models.CharField(max_length=100, unique=True)
+    centroids = models.JSONField(help_text="All k-means cluster centers, one list per cluster")
+    last_run_at = models.DateTimeField(help_text="Start of the run that produced the centroids")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.key} ({self.last_run_at:%Y-%m-%d %H:%M})"
@@ -1,3 +1,44 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Narrative, NarrativeCluster, TimelineEvent
+
 
-# Create your tests here.
+class AdminChangelistQueryCountTests(TestCase):
+    """Changelists showing the narrative column must not query once per row."""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+    
+    def setUp(self):
+        self.client.force_login(self.user)
+    
+    def add_rows(self, count):
+        for _ in range(count):
+            narrative = Narrative.objects.create(name=f"Narrative {Narrative.objects.count()}", description="")
+            NarrativeCluster.objects.create(narrative=narrative, cluster_date=date.today())
+            TimelineEvent.objects.create(
+                narrative=narrative, event_type='emergence', description="", event_date=timezone.now()
+            )
+    
+    def assert_constant_queries(self, url):
+        self.add_rows(1)
+        with CaptureQueriesContext(connection) as single_row:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        
+        self.add_rows(5)
+        with self.assertNumQueries(len(single_row)):
+            self.assertEqual(self.client.get(url).status_code, 200)
+    
+    def test_narrative_cluster_changelist(self):
+        self.assert_constant_queries(reverse('admin:narratives_narrativecluster_changelist'))
+    
+    def test_timeline_event_changelist(self):
+        self.assert_constant_queries(reverse('admin:narratives_timelineevent_changelist'))
@@ -1,8 +1,12 @@
 from django.urls import path
+from django.views.decorators.cache import cache_page
 from .views import NarrativeListView, TimelineView, NarrativeClusterListView
 
+# Narratives only change when the batch commands run; serve repeat list requests from cache
+LIST_CACHE_TIMEOUT = 60
+
 urlpatterns = [
-    path('narratives/', NarrativeListView.as_view(), name='narrative-list'),
-    path('timeline/', TimelineView.as_view(), name='timeline'),
-    path('clusters/', NarrativeClusterListView.as_view(), name='narrative-cluster-list'),
-]
\ No newline at end of file
+    path('narratives/', cache_page(LIST_CACHE_TIMEOUT)(NarrativeListView.as_view()), name='narrative-list'),
+    path('timeline/', cache_page(LIST_CACHE_TIMEOUT)(TimelineView.as_view()), name='timeline'),
+    path('clusters/', cache_page(LIST_CACHE_TIMEOUT)(NarrativeClusterListView.as_view()), name='narrative-cluster-list'),
+]
@@ -6,16 +6,48 @@ import numpy as np
 import hashlib
 import re
 from collections import Counter
-from sklearn.feature_extraction.text import TfidfVectorizer
+from django.core.cache import cache
+from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer, TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from typing import List, Dict, Tuple, Any, Optional
 
-# Optional dependency - use fallback if not available
-try:
-    import networkx as nx
-    HAS_NETWORKX = True
-except ImportError:
-    HAS_NETWORKX = False
+# How long compressed cluster content is reused for the same articles (seconds)
+COMPRESSION_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Sentence boundaries for extract_sentences
+_SENTENCE_SPLIT = re.compile(r'[.!?]+')
+
+# Entity patterns, compiled once at import
+
+# Ukrainian person names (often end with -енко, -ський, -цький, -ич, etc.)
+_UK_PERSON = re.compile(r'\b[А-ЯІЇЄҐ][а-яіїєґ]+(?:\s[А-ЯІЇЄҐ][а-яіїєґ]+){1,2}\b')
+# Organizations (Ukrainian terms)
+_UK_ORG = re.compile(r'\b[А-ЯІЇЄҐ][а-яіїєґ\s]*(?:підприємство|компанія|корпорація|організація|агентство|департамент|міністерство|служба|установа|фонд|партія)\b')
+# Locations (after prepositions like 'у', 'в', 'з')
+_UK_LOCATION = re.compile(r'(?:у|в|з|до|від)\s+([А-ЯІЇЄҐ][а-яіїєґ]+(?:\s[А-ЯІЇЄҐ][а-яіїєґ]+)?)')
+# Money amounts (hryvnia, dollars, euros)
+_UK_MONEY = re.compile(r'(?:₴|грн\.?|\$|€)\s?[\d\s,]+(?:\.\d{2})?(?:\s*(?:мільйон|мільярд|трильйон|тисяч|млн|млрд))?', re.IGNORECASE)
+# Ukrainian dates
+_UK_DATE = re.compile(r'\b(?:січня|лютого|березня|квітня|травня|червня|липня|серпня|вересня|жовтня|листопада|грудня)\s+\d{1,2}(?:,?\s+\d{4})?\b', re.IGNORECASE)
+
+# Person names (capitalized words, often 2-3 words)
+_EN_PERSON = re.compile(r'\b[A-Z][a-z]+ [A-Z][a-z]+(?:\s[A-Z][a-z]+)?\b')
+# Organizations (words with Corp, Inc, Ltd, etc.)
+_EN_ORG = re.compile(r'\b[A-Z][a-zA-Z\s]*(?:Corp|Inc|Ltd|LLC|Company|Organization|Agency|Department|Ministry)\b')
+# Locations (capitalized words after 'in', 'at', 'from')
+_EN_LOCATION = re.compile(r'(?:in|at|from)\s+([A-Z][a-z]+(?:\s[A-Z][a-z]+)?)')
+# Money amounts
+_EN_MONEY = re.compile(r'\$[\d,]+(?:\.\d{2})?(?:\s*(?:million|billion|trillion))?', re.IGNORECASE)
+# Dates
+_EN_DATE = re.compile(r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}\b', re.IGNORECASE)
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, highest first, via argpartition (O(n + k log k))."""
+    if k >= len(scores):
+        return np.argsort(-scores, kind='stable')
+    top = np.argpartition(-scores, k)[:k]
+    return top[np.argsort(-scores[top], kind='stable')]
 
 
 class ContentCompressor:
@@ -34,6 +66,9 @@ class ContentCompressor:
         self.language = language
         self.tfidf_vectorizer = None
         self.stop_words = self._get_stop_words(language)
+        # TfidfVectorizer wants a list (or a built-in name); built once per compressor
+        self._vectorizer_stop_words = list(self.stop_words) if language == 'uk' else 'english'
+        self._prompt_content_cache = {}  # (content_hash, entities, sources) -> prompt content for this run
     
     def _get_stop_words(self, language):
         """Get stop words for specified language."""
@@ -71,30 +106,82 @@ class ContentCompressor:
         if len(embeddings) <= max_medoids:
             return list(range(len(embeddings)))
         
-        # Calculate pairwise distances
-        similarities = cosine_similarity(embeddings)
-        distances = 1 - similarities
+        # Row i's summed cosine similarity is E[i] · Σ_j E[j], so no N×N matrix is needed
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        normalized = embeddings / np.maximum(norms, 1e-12)
+        avg_similarities = normalized @ normalized.sum(axis=0) / len(normalized)
         
-        # Find articles with minimum average distance to others
-        avg_distances = np.mean(distances, axis=1)
-        medoid_indices = np.argsort(avg_distances)[:max_medoids]
+        # Highest average similarity == minimum average distance to others;
+        # for a single medoid this is the row closest to the centroid direction
+        if max_medoids == 1:
+            return [int(np.argmax(avg_similarities))]
+        medoid_indices = top_k_indices(avg_similarities, max_medoids)
         
         return medoid_indices.tolist()
     
     def extract_sentences(self, text: str) -> List[str]:
         """Extract sentences from text."""
         # Simple sentence splitting
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if len(s.strip()) > 20]
-        return sentences
+        sentences = (sentence.strip() for sentence in _SENTENCE_SPLIT.split(text))
+        return [sentence for sentence in sentences if len(sentence) > 20]
+    
+    def fit_tfidf(self, texts: List[str], ngram_range: Tuple[int, int] = (1, 1)):
+        """
+        Fit a TF-IDF model on texts with the language's stop words.
+        
+        Args:
+            texts: Documents (e.g. sentences) to vectorize
+            ngram_range: Word n-gram range
+            
+        Returns:
+            Tuple of (sparse float32 TF-IDF matrix, feature names)
+        """
+        vectorizer = TfidfVectorizer(
+            stop_words=self._vectorizer_stop_words,
+            ngram_range=ngram_range,
+            lowercase=True,
+            dtype=np.float32
+        )
+        tfidf_matrix = vectorizer.fit_transform(texts)
+        return tfidf_matrix, vectorizer.get_feature_names_out()
     
-    def textrank_sentences(self, sentences: List[str], max_sentences: int = 8) -> List[str]:
+    def fit_sentence_terms(self, sentences: List[str]):
+        """
+        Count unigrams and bigrams over sentences once, for both ranking steps.
+        
+        Sentence ranking gets unigram TF-IDF rows (what fit_tfidf(sentences)
+        would give), key terms get the raw counts so they rank by frequency
+        across the cluster as with a single combined document.
+        
+        Args:
+            sentences: Sentences from all cluster articles
+            
+        Returns:
+            Tuple of (unigram float32 TF-IDF matrix, (count matrix, feature names))
+        """
+        vectorizer = CountVectorizer(
+            stop_words=self._vectorizer_stop_words,
+            ngram_range=(1, 2),
+            lowercase=True
+        )
+        counts = vectorizer.fit_transform(sentences).tocsc()
+        feature_names = vectorizer.get_feature_names_out()
+        
+        unigram_columns = np.flatnonzero([' ' not in name for name in feature_names])
+        sentence_tfidf = TfidfTransformer().fit_transform(counts[:, unigram_columns]).astype(np.float32)
+        
+        return sentence_tfidf, (counts, feature_names)
+    
+    def textrank_sentences(self, sentences: List[str], max_sentences: int = 8,
+                           tfidf_matrix=None) -> List[str]:
         """
         Extract key sentences using TextRank algorithm.
         
         Args:
             sentences: List of sentences
             max_sentences: Maximum sentences to return
+            tfidf_matrix: Optional precomputed TF-IDF rows for sentences
             
         Returns:
             List of most important sentences
@@ -102,52 +189,75 @@ class ContentCompressor:
         if len(sentences) <= max_sentences:
             return sentences
         
-        # Try TextRank with NetworkX if available
-        if HAS_NETWORKX:
-            try:
-                return self._textrank_with_networkx(sentences, max_sentences)
-            except Exception:
-                pass  # Fall through to simple fallback
+        try:
+            return self._textrank(sentences, max_sentences, tfidf_matrix)
+        except Exception:
+            pass  # Fall through to simple fallback
         
         # Fallback: TF-IDF based sentence ranking
-        return self._simple_sentence_ranking(sentences, max_sentences)
+        return self._simple_sentence_ranking(sentences, max_sentences, tfidf_matrix)
     
-    def _textrank_with_networkx(self, sentences: List[str], max_sentences: int) -> List[str]:
-        """TextRank implementation using NetworkX."""
-        stop_words = list(self.stop_words) if self.language == 'uk' else 'english'
-        vectorizer = TfidfVectorizer(stop_words=stop_words, lowercase=True)
-        tfidf_matrix = vectorizer.fit_transform(sentences)
+    def _textrank(self, sentences: List[str], max_sentences: int, tfidf_matrix=None) -> List[str]:
+        """TextRank: PageRank over the sentence similarity matrix."""
+        if tfidf_matrix is None:
+            tfidf_matrix, _ = self.fit_tfidf(sentences)
         
         # Calculate similarity matrix
         similarity_matrix = cosine_similarity(tfidf_matrix)
         
-        # Create graph
-        nx_graph = nx.from_numpy_array(similarity_matrix)
-        
         # Calculate PageRank scores
-        scores = nx.pagerank(nx_graph)
+        scores = self._pagerank(similarity_matrix)
         
         # Sort sentences by score
-        ranked_sentences = sorted(
-            [(score, sentence) for sentence, score in 
-             zip(sentences, scores.values())], 
-            reverse=True
-        )
+        top_indices = top_k_indices(scores, max_sentences)
         
-        return [sentence for _, sentence in ranked_sentences[:max_sentences]]
+        return [sentences[i] for i in top_indices]
     
-    def _simple_sentence_ranking(self, sentences: List[str], max_sentences: int) -> List[str]:
+    def _pagerank(self, weights: np.ndarray, damping: float = 0.85,
+                  max_iter: int = 100, tol: float = 1e-6) -> np.ndarray:
+        """
+        Weighted PageRank by power iteration on a dense adjacency matrix.
+        
+        Same model as networkx.pagerank on nx.from_numpy_array(weights):
+        rows are normalized into transition probabilities, rows without
+        edges spread their mass uniformly, and iteration stops once the L1
+        change drops below n * tol.
+        
+        Args:
+            weights: Square non-negative edge-weight matrix
+            damping: Probability of following an edge instead of jumping
+            max_iter: Maximum power iterations
+            tol: Per-node convergence tolerance
+            
+        Returns:
+            PageRank score per node (sums to 1)
+        """
+        n = len(weights)
+        row_sums = weights.sum(axis=1)
+        dangling = row_sums == 0
+        transition = weights / np.where(dangling, 1.0, row_sums)[:, np.newaxis]
+        
+        scores = np.full(n, 1.0 / n)
+        for _ in range(max_iter):
+            previous = scores
+            scores = damping * (previous @ transition + previous[dangling].sum() / n) + (1 - damping) / n
+            if np.abs(scores - previous).sum() < n * tol:
+                break
+        
+        return scores
+    
+    def _simple_sentence_ranking(self, sentences: List[str], max_sentences: int,
+                                 tfidf_matrix=None) -> List[str]:
         """Simple sentence ranking based on TF-IDF scores."""
         try:
-            stop_words = list(self.stop_words) if self.language == 'uk' else 'english'
-            vectorizer = TfidfVectorizer(stop_words=stop_words, lowercase=True)
-            tfidf_matrix = vectorizer.fit_transform(sentences)
+            if tfidf_matrix is None:
+                tfidf_matrix, _ = self.fit_tfidf(sentences)
             
             # Calculate sentence importance as sum of TF-IDF scores
             sentence_scores = np.array(tfidf_matrix.sum(axis=1)).flatten()
             
             # Get top sentences
-            top_indices = np.argsort(sentence_scores)[-max_sentences:][::-1]
+            top_indices = top_k_indices(sentence_scores, max_sentences)
             
             return [sentences[i] for i in top_indices]
             
@@ -155,38 +265,36 @@ class ContentCompressor:
             # Final fallback: return first sentences
             return sentences[:max_sentences]
     
-    def extract_key_terms(self, texts: List[str], max_terms: int = 15) -> List[str]:
+    def extract_key_terms(self, texts: List[str], max_terms: int = 15,
+                          term_counts=None) -> List[str]:
         """
         Extract key terms using TF-IDF.
         
         Args:
             texts: List of texts to analyze
             max_terms: Maximum terms to return
+            term_counts: Optional precomputed (count matrix, feature names) from
+                fit_sentence_terms; terms are then scored by their total count
             
         Returns:
             List of important terms
         """
         try:
-            # Combine texts
-            combined_text = ' '.join(texts)
+            if term_counts is None:
+                # Combine texts; single document with bigrams
+                term_counts = self.fit_tfidf([' '.join(texts)], ngram_range=(1, 2))
             
-            # Create TF-IDF vectorizer
-            stop_words = list(self.stop_words) if self.language == 'uk' else 'english'
-            vectorizer = TfidfVectorizer(
-                max_features=1000,
-                stop_words=stop_words,
-                ngram_range=(1, 2),  # Include bigrams
-                min_df=1,
-                lowercase=True
-            )
+            term_matrix, feature_names = term_counts
             
-            tfidf_matrix = vectorizer.fit_transform([combined_text])
-            feature_names = vectorizer.get_feature_names_out()
-            tfidf_scores = tfidf_matrix.toarray()[0]
+            # Sum scores over the stored non-zeros only; no dense vocabulary-sized row
+            term_matrix = term_matrix.tocsr()
+            term_columns, term_positions = np.unique(term_matrix.indices, return_inverse=True)
+            term_scores = np.bincount(term_positions, weights=term_matrix.data)
             
             # Get top terms
-            top_indices = np.argsort(tfidf_scores)[-max_terms:][::-1]
-            key_terms = [feature_names[i] for i in top_indices if tfidf_scores[i] > 0]
+            top_indices = top_k_indices(term_scores, max_terms)
+            top_indices = top_indices[term_scores[top_indices] > 0]
+            key_terms = feature_names[term_columns[top_indices]].tolist()
             
             return key_terms
             
@@ -221,58 +329,36 @@ class ContentCompressor:
     
     def _extract_ukrainian_entities(self, text: str, entities: Dict[str, List[str]]) -> Dict[str, List[str]]:
         """Extract entities from Ukrainian text."""
-        
-        # Ukrainian person names (often end with -енко, -ський, -цький, -ич, etc.)
-        person_pattern = r'\b[А-ЯІЇЄҐ][а-яіїєґ]+(?:\s[А-ЯІЇЄҐ][а-яіїєґ]+){1,2}\b'
-        entities['PERSON'] = list(set(re.findall(person_pattern, text)))
-        
-        # Organizations (Ukrainian terms)
-        org_pattern = r'\b[А-ЯІЇЄҐ][а-яіїєґ\s]*(?:підприємство|компанія|корпорація|організація|агентство|департамент|міністерство|служба|установа|фонд|партія)\b'
-        entities['ORG'] = list(set(re.findall(org_pattern, text)))
-        
-        # Locations (after prepositions like 'у', 'в', 'з')
-        location_pattern = r'(?:у|в|з|до|від)\s+([А-ЯІЇЄҐ][а-яіїєґ]+(?:\s[А-ЯІЇЄҐ][а-яіїєґ]+)?)'
-        matches = re.findall(location_pattern, text)
-        entities['GPE'] = list(set(match[0] if isinstance(match, tuple) else match for match in matches))
-        
-        # Money amounts (hryvnia, dollars, euros)
-        money_pattern = r'(?:₴|грн\.?|\$|€)\s?[\d\s,]+(?:\.\d{2})?(?:\s*(?:мільйон|мільярд|трильйон|тисяч|млн|млрд))?'
-        entities['MONEY'] = list(set(re.findall(money_pattern, text, re.IGNORECASE)))
-        
-        # Ukrainian dates
-        date_pattern = r'\b(?:січня|лютого|березня|квітня|травня|червня|липня|серпня|вересня|жовтня|листопада|грудня)\s+\d{1,2}(?:,?\s+\d{4})?\b'
-        entities['DATE'] = list(set(re.findall(date_pattern, text, re.IGNORECASE)))
+        entities['PERSON'] = list(dict.fromkeys(_UK_PERSON.findall(text)))
+        entities['ORG'] = list(dict.fromkeys(_UK_ORG.findall(text)))
+        entities['GPE'] = list(dict.fromkeys(_UK_LOCATION.findall(text)))
+        entities['MONEY'] = list(dict.fromkeys(_UK_MONEY.findall(text)))
+        entities['DATE'] = list(dict.fromkeys(_UK_DATE.findall(text)))
         
         # Filter empty entities
         return {k: v for k, v in entities.items() if v}
     
     def _extract_english_entities(self, text: str, entities: Dict[str, List[str]]) -> Dict[str, List[str]]:
         """Extract entities from English text."""
-        
-        # Person names (capitalized words, often 2-3 words)
-        person_pattern = r'\b[A-Z][a-z]+ [A-Z][a-z]+(?:\s[A-Z][a-z]+)?\b'
-        entities['PERSON'] = list(set(re.findall(person_pattern, text)))
-        
-        # Organizations (words with Corp, Inc, Ltd, etc.)
-        org_pattern = r'\b[A-Z][a-zA-Z\s]*(?:Corp|Inc|Ltd|LLC|Company|Organization|Agency|Department|Ministry)\b'
-        entities['ORG'] = list(set(re.findall(org_pattern, text)))
-        
-        # Locations (capitalized words after 'in', 'at', 'from')
-        location_pattern = r'(?:in|at|from)\s+([A-Z][a-z]+(?:\s[A-Z][a-z]+)?)'
-        entities['GPE'] = list(set(match[0] if isinstance(match, tuple) else match 
-                                 for match in re.findall(location_pattern, text)))
-        
-        # Money amounts
-        money_pattern = r'\$[\d,]+(?:\.\d{2})?(?:\s*(?:million|billion|trillion))?'
-        entities['MONEY'] = list(set(re.findall(money_pattern, text, re.IGNORECASE)))
-        
-        # Dates
-        date_pattern = r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}\b'
-        entities['DATE'] = list(set(re.findall(date_pattern, text, re.IGNORECASE)))
+        entities['PERSON'] = list(dict.fromkeys(_EN_PERSON.findall(text)))
+        entities['ORG'] = list(dict.fromkeys(_EN_ORG.findall(text)))
+        entities['GPE'] = list(dict.fromkeys(_EN_LOCATION.findall(text)))
+        entities['MONEY'] = list(dict.fromkeys(_EN_MONEY.findall(text)))
+        entities['DATE'] = list(dict.fromkeys(_EN_DATE.findall(text)))
         
         # Filter empty entities
         return {k: v for k, v in entities.items() if v}
     
+    def _compression_cache_key(self, articles: List[Any], use_embeddings: bool,
+                               *params: int) -> Optional[str]:
+        """Cache key from the cluster's sorted article ids and settings; None if any id is missing."""
+        article_ids = sorted(getattr(article, 'id', None) or 0 for article in articles)
+        if not article_ids[0]:
+            return None
+        
+        key_source = f"{self.language}|{int(use_embeddings)}|{params}|{','.join(map(str, article_ids))}"
+        return f"compress:{hashlib.md5(key_source.encode()).hexdigest()}"
+    
     def compress_cluster_content(self, articles: List[Any], 
                                 embeddings: Optional[np.ndarray] = None,
                                 max_medoids: int = 3,
@@ -294,6 +380,16 @@ class ContentCompressor:
         if not articles:
             return {}
         
+        # Reprocessed clusters (same articles and settings) reuse the earlier result
+        cluster_key = self._compression_cache_key(
+            articles, embeddings is not None and len(embeddings) == len(articles),
+            max_medoids, max_sentences, max_terms
+        )
+        if cluster_key:
+            cached = cache.get(cluster_key)
+            if cached is not None:
+                return cached
+        
         # Select medoid articles if embeddings available
         medoid_indices = None
         if embeddings is not None and len(embeddings) == len(articles):
@@ -322,29 +418,45 @@ class ContentCompressor:
         for text in all_text:
             all_sentences.extend(self.extract_sentences(text))
         
-        key_sentences = self.textrank_sentences(all_sentences, max_sentences)
+        # One tokenization pass feeds both sentence ranking and key terms
+        sentence_tfidf, term_counts = None, None
+        if all_sentences:
+            try:
+                sentence_tfidf, term_counts = self.fit_sentence_terms(all_sentences)
+            except ValueError:
+                pass  # Only stop words; each step falls back on its own
+        
+        key_sentences = self.textrank_sentences(all_sentences, max_sentences, tfidf_matrix=sentence_tfidf)
         
         # Extract key terms
-        key_terms = self.extract_key_terms(all_text, max_terms)
+        key_terms = self.extract_key_terms(all_text, max_terms, term_counts=term_counts)
         
-        # Extract entities from combined text
-        combined_text = ' '.join(all_text)
-        entities = self.extract_entities(combined_text)
+        # Extract entities per article and union them, so no match spans two articles
+        merged_entities = {}
+        for text in all_text:
+            for entity_type, entity_list in self.extract_entities(text).items():
+                merged_entities.setdefault(entity_type, {}).update(dict.fromkeys(entity_list))
+        entities = {entity_type: list(values) for entity_type, values in merged_entities.items()}
+        combined_length = sum(len(text) for text in all_text) + len(all_text) - 1
         
         # Calculate content hash for caching
         content_hash = hashlib.md5(
             ''.join(key_sentences + key_terms).encode()
         ).hexdigest()
         
-        return {
+        compressed = {
             'medoid_articles': article_summaries,
             'key_sentences': key_sentences,
             'key_terms': key_terms,
             'entities': entities,
             'content_hash': content_hash,
             'total_articles': len(articles),
-            'compression_ratio': len(' '.join(key_sentences)) / len(combined_text)
+            'compression_ratio': len(' '.join(key_sentences)) / combined_length
         }
+        if cluster_key:
+            cache.set(cluster_key, compressed, timeout=COMPRESSION_CACHE_TIMEOUT)
+        
+        return compressed
     
     def create_llm_prompt_content(self, compressed_data: Dict[str, Any]) -> str:
         """
@@ -356,6 +468,20 @@ class ContentCompressor:
         Returns:
             Formatted string for LLM prompt
         """
+        # Entity and source lines also go into the prompt but not into content_hash
+        entities_str = []
+        for entity_type, entity_list in (compressed_data.get('entities') or {}).items():
+            if entity_list:
+                entities_str.append(f"{entity_type}: {', '.join(entity_list[:3])}")
+        
+        sources = [art['source'] for art in compressed_data.get('medoid_articles') or []]
+        unique_sources = list(dict.fromkeys(sources))
+        
+        content_hash = compressed_data.get('content_hash')
+        cache_key = (content_hash, tuple(entities_str), tuple(unique_sources))
+        if content_hash and cache_key in self._prompt_content_cache:
+            return self._prompt_content_cache[cache_key]
+        
         content_parts = []
         
         # Key sentences
@@ -367,24 +493,21 @@ class ContentCompressor:
         # Important terms
         if compressed_data.get('key_terms'):
             terms = compressed_data['key_terms'][:10]
-            content_parts.append(f"\\nImportant terms: {', '.join(terms)}")
+            content_parts.append(f"\nImportant terms: {', '.join(terms)}")
         
         # Entities
-        if compressed_data.get('entities'):
-            entities_str = []
-            for entity_type, entity_list in compressed_data['entities'].items():
-                if entity_list:
-                    entities_str.append(f"{entity_type}: {', '.join(entity_list[:3])}")
-            if entities_str:
-                content_parts.append(f"\\nKey entities: {'; '.join(entities_str)}")
+        if entities_str:
+            content_parts.append(f"\nKey entities: {'; '.join(entities_str)}")
         
         # Sources info
-        if compressed_data.get('medoid_articles'):
-            sources = [art['source'] for art in compressed_data['medoid_articles']]
-            unique_sources = list(set(sources))
-            content_parts.append(f"\\nSources ({len(unique_sources)}): {', '.join(unique_sources)}")
+        if sources:
+            content_parts.append(f"\nSources ({len(unique_sources)}): {', '.join(unique_sources)}")
         
-        return '\\n'.join(content_parts)
+        prompt_content = '\n'.join(content_parts)
+        if content_hash:
+            self._prompt_content_cache[cache_key] = prompt_content
+        
+        return prompt_content
     
     def calculate_coherence_score(self, embeddings: np.ndarray) -> float:
         """
@@ -400,21 +523,18 @@ class ContentCompressor:
             return 1.0  # Perfect coherence for single article
         
         try:
-            from sklearn.metrics.pairwise import cosine_similarity
-            
-            # Calculate pairwise similarities
-            similarities = cosine_similarity(embeddings)
-            
-            # Get upper triangle (excluding diagonal)
-            n = len(similarities)
-            upper_triangle = []
+            # For L2-normalized rows, the sum over all ordered pairs i != j of
+            # E[i]·E[j] is ‖Σ E[i]‖² minus the self-similarities
+            embeddings = np.asarray(embeddings, dtype=np.float32)
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            normalized = embeddings / np.maximum(norms, 1e-12)
             
-            for i in range(n):
-                for j in range(i + 1, n):
-                    upper_triangle.append(similarities[i][j])
+            n = len(normalized)
+            column_sum = normalized.sum(axis=0)
+            self_similarity = np.einsum('ij,ij->', normalized, normalized)
             
             # Return average similarity
-            return np.mean(upper_triangle) if upper_triangle else 0.0
+            return float((column_sum @ column_sum - self_similarity) / (n * (n - 1)))
             
         except Exception as e:
             # Fallback to 0 if calculation fails
@@ -0,0 +1,38 @@
+"""
+Helpers for turning stored embeddings into NumPy matrices for clustering.
+"""
+from typing import Iterable, Optional
+
+import numpy as np
+
+
+def to_float32_matrix(vectors: Iterable, count: Optional[int] = None,
+                      dimensions: Optional[int] = None) -> np.ndarray:
+    """
+    Copy embedding vectors into a preallocated C-contiguous float32 matrix.
+    
+    Avoids building an intermediate list and letting NumPy infer the dtype
+    (float64 for plain lists), which doubles memory traffic for large weeks.
+    
+    Args:
+        vectors: Iterable of embedding vectors (numpy arrays or lists)
+        count: Number of vectors, required when vectors has no len()
+        dimensions: Embedding size; taken from the first vector if omitted
+    
+    Returns:
+        Array of shape (count, dimensions) with dtype float32
+    """
+    if count is None:
+        vectors = vectors if hasattr(vectors, '__len__') else list(vectors)
+        count = len(vectors)
+    
+    matrix = None
+    for i, vector in enumerate(vectors):
+        if matrix is None:
+            matrix = np.empty((count, dimensions or len(vector)), dtype=np.float32)
+        matrix[i] = vector
+    
+    if matrix is None:
+        return np.empty((0, dimensions or 0), dtype=np.float32)
+    
+    return matrix
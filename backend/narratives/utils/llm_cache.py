@@ -1,12 +1,14 @@
 """
 LLM response caching utilities using Redis for cost optimization.
 """
-import json
 import hashlib
-from typing import Optional, Dict, Any
+import logging
+from typing import Optional, Dict, Any, List, Tuple
 from django.core.cache import cache
 from django.conf import settings
 
+logger = logging.getLogger(__name__)
+
 
 class LLMCache:
     """
@@ -43,14 +45,44 @@ class LLMCache:
             
             cached_data = cache.get(cache_key)
             if cached_data:
-                return json.loads(cached_data) if isinstance(cached_data, str) else cached_data
+                return cached_data
                 
         except Exception as e:
             # Log error but don't fail
-            print(f"Cache read error: {e}")
+            logger.warning("Cache read error: %s", e)
         
         return None
     
+    def get_cached_responses(self, contents: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """
+        Get cached LLM responses for many inputs in one cache round-trip.
+        
+        Args:
+            contents: List of (content, task_type) pairs
+            
+        Returns:
+            Dict mapping each (content, task_type) pair found in cache to its cached response dict
+        """
+        try:
+            keys = {
+                self._make_cache_key(self._hash_content(content), task_type): (content, task_type)
+                for content, task_type in contents
+            }
+            
+            # Single MGET on Redis instead of one GET per input
+            cached_items = cache.get_many(list(keys))
+            return {
+                keys[cache_key]: cached_data
+                for cache_key, cached_data in cached_items.items()
+                if cached_data
+            }
+            
+        except Exception as e:
+            # Log error but don't fail
+            logger.warning("Cache read error: %s", e)
+        
+        return {}
+    
     def cache_response(self, content: str, response: str, task_type: str = "naming", 
                       metadata: Optional[Dict[str, Any]] = None, 
                       timeout: Optional[int] = None) -> bool:
@@ -79,13 +111,48 @@ class LLMCache:
             }
             
             cache_timeout = timeout or self.default_timeout
-            cache.set(cache_key, json.dumps(cache_data), cache_timeout)
+            # The cache backend serializes the dict itself (pickle); no JSON layer on top
+            cache.set(cache_key, cache_data, cache_timeout)
             
             return True
             
         except Exception as e:
             # Log error but don't fail
-            print(f"Cache write error: {e}")
+            logger.warning("Cache write error: %s", e)
+            return False
+    
+    def cache_responses(self, responses: List[Tuple[str, str, str]],
+                        metadata: Optional[Dict[str, Any]] = None,
+                        timeout: Optional[int] = None) -> bool:
+        """
+        Cache many LLM responses in one cache round-trip.
+        
+        Args:
+            responses: List of (content, response, task_type) triples
+            metadata: Optional metadata stored with every response
+            timeout: Cache timeout in seconds
+            
+        Returns:
+            True if successfully cached, False otherwise
+        """
+        try:
+            cache_items = {}
+            for content, response, task_type in responses:
+                content_hash = self._hash_content(content)
+                cache_items[self._make_cache_key(content_hash, task_type)] = {
+                    'response': response,
+                    'content_hash': content_hash,
+                    'task_type': task_type,
+                    'metadata': metadata or {}
+                }
+            
+            cache.set_many(cache_items, timeout or self.default_timeout)
+            
+            return True
+            
+        except Exception as e:
+            # Log error but don't fail
+            logger.warning("Cache write error: %s", e)
             return False
     
     def get_cache_stats(self) -> Dict[str, Any]:
@@ -121,7 +188,7 @@ class LLMCache:
             return True
             
         except Exception as e:
-            print(f"Cache clear error: {e}")
+            logger.warning("Cache clear error: %s", e)
             return False
 
 
@@ -199,6 +266,45 @@ def get_cluster_name_cached(compressed_content: Dict[str, Any], llm_func) -> str
     return response
 
 
+def get_cluster_names_cached(compressed_contents: List[Dict[str, Any]], llm_func) -> List[str]:
+    """
+    Get names for many clusters, looking up and storing the cache in bulk.
+    
+    Args:
+        compressed_contents: Compressed content dicts, one per cluster
+        llm_func: Function that calls LLM to generate a name from prompt content
+        
+    Returns:
+        Generated or cached cluster names, in input order
+    """
+    from narratives.utils.content_compression import ContentCompressor
+    
+    compressor = ContentCompressor()
+    prompt_contents = [compressor.create_llm_prompt_content(content) for content in compressed_contents]
+    
+    # Try cache first, one round-trip for all clusters
+    cached = llm_cache.get_cached_responses([(content, "naming") for content in prompt_contents])
+    
+    names = []
+    new_responses = []
+    for prompt_content in prompt_contents:
+        cached_data = cached.get((prompt_content, "naming"))
+        if cached_data:
+            names.append(cached_data.get('response'))
+            continue
+        
+        # Generate new response
+        response = llm_func(prompt_content)
+        names.append(response)
+        new_responses.append((prompt_content, response, "naming"))
+    
+    # Cache the new responses together
+    if new_responses:
+        llm_cache.cache_responses(new_responses, metadata={'cost': 0.0001})
+    
+    return names
+
+
 def get_weekly_brief_cached(narratives_summary: str, llm_func) -> str:
     """
     Get weekly brief with caching.
@@ -0,0 +1,21 @@
+"""
+Shared LLM client construction for the narrative management commands.
+"""
+import functools
+
+from langchain_google_genai import GoogleGenerativeAI
+
+
+@functools.lru_cache(maxsize=8)
+def get_llm(model_name: str, api_key: str) -> GoogleGenerativeAI:
+    """
+    Get a Gemini client, reusing one instance per (model, API key).
+    
+    Args:
+        model_name: Gemini model name, e.g. "gemini-2.5-flash-lite"
+        api_key: Google API key
+        
+    Returns:
+        GoogleGenerativeAI client
+    """
+    return GoogleGenerativeAI(model=model_name, google_api_key=api_key)
@@ -0,0 +1,38 @@
+"""
+Helpers for pacing and batching requests to external APIs.
+"""
+import threading
+import time
+from itertools import islice
+
+
+def chunked(iterable, size):
+    """Yield successive lists of up to `size` items from iterable."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class RateLimiter:
+    """Spaces out API requests across worker threads to respect rate limits."""
+    
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+    
+    def wait(self):
+        """Block until the next request slot is available."""
+        if self.min_interval <= 0:
+            return
+        
+        with self.lock:
+            now = time.monotonic()
+            wait_time = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.min_interval
+        
+        if wait_time > 0:
+            time.sleep(wait_time)
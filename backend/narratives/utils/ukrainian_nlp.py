@@ -2,44 +2,143 @@
 Ukrainian Natural Language Processing utilities.
 Provides spaCy integration for Ukrainian text processing.
 """
+import copy
+import hashlib
 import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
 from typing import List, Dict, Any, Optional, Set
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
-# Try to import spaCy and Ukrainian model
+# Try to import spaCy; the Ukrainian model itself is loaded on first use
 try:
     import spacy
-    from spacy import displacy
-    
-    # Try to load Ukrainian model
-    try:
-        nlp_uk = spacy.load("uk_core_news_sm")
-        HAS_UKRAINIAN_MODEL = True
-    except OSError:
-        logger.warning("Ukrainian spaCy model not found. Install with: python -m spacy download uk_core_news_sm")
-        nlp_uk = None
-        HAS_UKRAINIAN_MODEL = False
-        
+    from spacy.attrs import POS
     HAS_SPACY = True
 except ImportError:
     logger.warning("spaCy not installed. Install with: pip install spacy")
     spacy = None
-    nlp_uk = None
     HAS_SPACY = False
-    HAS_UKRAINIAN_MODEL = False
+
+_nlp_uk = None
+_nlp_loaded = False
+_nlp_lock = threading.Lock()
+
+
+def load_ukrainian_model():
+    """
+    Load uk_core_news_sm once per process, on first call.
+    
+    Keeps the model load (seconds, ~100MB) out of import time for workers
+    and management commands that never process Ukrainian text.
+    
+    Returns:
+        The spaCy Language object, or None if spaCy or the model is missing
+    """
+    global _nlp_uk, _nlp_loaded
+    if _nlp_loaded:
+        return _nlp_uk
+    
+    with _nlp_lock:
+        if _nlp_loaded:
+            return _nlp_uk
+        
+        if HAS_SPACY:
+            # GPU must be activated before the model is loaded
+            if getattr(settings, 'UKRAINIAN_NLP_DEVICE', 'cpu') == 'gpu' and not spacy.prefer_gpu():
+                logger.warning("UKRAINIAN_NLP_DEVICE=gpu but no GPU is available (needs cupy). Using CPU.")
+            
+            try:
+                _nlp_uk = spacy.load("uk_core_news_sm")
+            except OSError:
+                logger.warning("Ukrainian spaCy model not found. Install with: python -m spacy download uk_core_news_sm")
+        
+        if _nlp_uk is None:
+            logger.warning("Ukrainian NLP not available. Using fallback methods.")
+        
+        _nlp_loaded = True
+    
+    return _nlp_uk
+
+
+# Pipeline components each extraction needs; everything else is skipped per call.
+# uk_core_news_sm tags POS with a morphologizer, other pipelines use a tagger.
+_POS_PIPES = ("morphologizer", "tagger", "attribute_ruler")
+TASK_PIPES = {
+    'entities': ("tok2vec", "ner"),
+    'keywords': ("tok2vec",) + _POS_PIPES + ("lemmatizer",),
+    'sentences': ("tok2vec", "parser", "senter"),
+    # sentence_count and entity_count still need the parser and NER
+    'stats': ("tok2vec",) + _POS_PIPES + ("parser", "senter", "ner"),
+    'analysis': ("tok2vec",) + _POS_PIPES + ("lemmatizer", "parser", "senter", "ner"),
+}
+
+# Parts of speech kept as keywords
+KEYWORD_POS = frozenset({'NOUN', 'ADJ', 'PROPN'})
+
+# Fallback regexes, compiled once at import
+_PERSON_RE = re.compile(r'\b[А-ЯІЇЄҐ][а-яіїєґ]+(?:\s[А-ЯІЇЄҐ][а-яіїєґ]+){1,2}\b')
+_ORG_RE = re.compile(r'\b[А-ЯІЇЄҐ][а-яіїєґ\s]*(?:підприємство|компанія|корпорація|організація|міністерство|служба|установа|фонд|партія)\b')
+_LOCATION_RE = re.compile(r'(?:у|в|з|до|від)\s+([А-ЯІЇЄҐ][а-яіїєґ]+(?:\s[А-ЯІЇЄҐ][а-яіїєґ]+)?)')
+_MONEY_RE = re.compile(r'(?:₴|грн\.?|\$|€)\s?[\d\s,]+(?:\.\d{2})?(?:\s*(?:мільйон|мільярд|трильйон|тисяч|млн|млрд))?', re.IGNORECASE)
+_DATE_RE = re.compile(r'\b(?:січня|лютого|березня|квітня|травня|червня|липня|серпня|вересня|жовтня|листопада|грудня)\s+\d{1,2}(?:,?\s+\d{4})?\b', re.IGNORECASE)
+_UK_WORD_RE = re.compile(r'\b[а-яіїєґА-ЯІЇЄҐ]{3,}\b')
+_WORD_RE = re.compile(r'\b\w+\b')
+_SENT_SPLIT_RE = re.compile(r'[.!?]+')
+
+# Letters found in Ukrainian but not Russian text, in both cases
+_UK_CHARS = frozenset('іїєґІЇЄҐ')
+
+# Ukrainian stop words for fallback keyword extraction
+UKRAINIAN_STOP_WORDS = frozenset({
+    'і', 'в', 'на', 'з', 'до', 'за', 'під', 'над', 'між', 'про', 'для',
+    'від', 'при', 'по', 'у', 'та', 'або', 'але', 'а', 'чи', 'не', 'ні',
+    'що', 'який', 'яка', 'яке', 'які', 'хто', 'де', 'коли', 'як', 'чому',
+    'це', 'той', 'та', 'те', 'ті', 'він', 'вона', 'воно', 'вони', 'я',
+    'ти', 'ми', 'ви', 'мій', 'твій', 'його', 'її', 'наш', 'ваш', 'їх'
+})
+
+# Extraction results kept in memory; repeated headlines skip the pipeline
+OUTPUT_CACHE_SIZE = 4096
+
+# nlp.pipe() batch sizes tried by warmup(); smaller batches regress badly in spaCy
+PIPE_BATCH_SIZES = (16, 32, 64, 128)
+MIN_PIPE_BATCH_SIZE = 4
 
 
 class UkrainianNLP:
     """Ukrainian NLP processor using spaCy."""
     
     def __init__(self):
-        self.nlp = nlp_uk if HAS_UKRAINIAN_MODEL else None
-        self.available = HAS_UKRAINIAN_MODEL
-        
-        if not self.available:
-            logger.warning("Ukrainian NLP not available. Using fallback methods.")
+        self._nlp = None
+        self._output_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Set by warmup(); SPACY_BATCH_SIZE and a single process until then
+        self._best_batch_size = None
+        self._best_n_process = None
+    
+    @property
+    def nlp(self):
+        """spaCy pipeline, loaded on first access."""
+        if self._nlp is None:
+            self._nlp = load_ukrainian_model()
+        return self._nlp
+    
+    @nlp.setter
+    def nlp(self, value):
+        # Cached results belong to the previous pipeline
+        self._nlp = value
+        self.clear_cache()
+    
+    @property
+    def available(self) -> bool:
+        """Whether the spaCy pipeline can be used (loads it if needed)."""
+        return self.nlp is not None
     
     def is_available(self) -> bool:
         """Check if Ukrainian NLP is available."""
@@ -64,6 +163,144 @@ class UkrainianNLP:
             logger.error(f"Error processing text with Ukrainian NLP: {e}")
             return None
     
+    def clear_cache(self):
+        """Drop cached extraction results; done automatically when self.nlp is replaced."""
+        with self._cache_lock:
+            self._output_cache.clear()
+    
+    def _run_cached(self, task: str, texts: List[str], from_doc, *args) -> List[Any]:
+        """
+        Apply from_doc to each text's Doc, serving repeated texts from an LRU cache.
+        
+        Keys are a 16-byte blake2b digest of the text plus task and args, so
+        long articles don't stay referenced by the cache. Only cache misses
+        are run through spaCy, with the components selected for task.
+        """
+        keys = [
+            (task, hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()) + args
+            for text in texts
+        ]
+        results = [None] * len(texts)
+        misses = []
+        
+        with self._cache_lock:
+            for i, key in enumerate(keys):
+                cached = self._output_cache.get(key)
+                if cached is None:
+                    misses.append(i)
+                else:
+                    self._output_cache.move_to_end(key)
+                    results[i] = cached
+        
+        if misses:
+            if len(misses) == 1:
+                with self._select_pipes(task):
+                    docs = [self.nlp(texts[misses[0]])]
+            else:
+                docs = self._pipe([texts[i] for i in misses], task=task)
+            
+            with self._cache_lock:
+                for i, doc in zip(misses, docs):
+                    results[i] = from_doc(doc, *args)
+                    self._output_cache[keys[i]] = results[i]
+                while len(self._output_cache) > OUTPUT_CACHE_SIZE:
+                    self._output_cache.popitem(last=False)
+        
+        # Callers get their own copies so they can't mutate cached results
+        return [copy.deepcopy(result) for result in results]
+    
+    def _select_pipes(self, task: str):
+        """Context manager that runs only the components needed for task."""
+        enable = [name for name in TASK_PIPES[task] if name in self.nlp.pipe_names]
+        return self.nlp.select_pipes(enable=enable)
+    
+    def warmup(self, sample_texts: List[str]) -> Dict[str, int]:
+        """
+        Pick the fastest nlp.pipe() batch size and process count for this host.
+        
+        Times the full pipeline on sample_texts for each PIPE_BATCH_SIZES
+        value with one process and with half the CPUs, and uses the winner
+        for later batch calls that don't pass their own values.
+        
+        Args:
+            sample_texts: Representative texts, e.g. a few hundred live articles
+            
+        Returns:
+            Dictionary with the chosen 'batch_size' and 'n_process'
+        """
+        if not self.available or not sample_texts:
+            return {'batch_size': self._batch_size(None), 'n_process': self._n_process(None)}
+        
+        # Multiprocess pipe() can't share a GPU model
+        process_counts = {1}
+        if getattr(settings, 'UKRAINIAN_NLP_DEVICE', 'cpu') != 'gpu':
+            process_counts.add(max(1, (os.cpu_count() or 1) // 2))
+        
+        timings = {}
+        for n_process in sorted(process_counts):
+            for batch_size in PIPE_BATCH_SIZES:
+                started = time.perf_counter()
+                try:
+                    for _ in self.nlp.pipe(sample_texts, batch_size=batch_size, n_process=n_process):
+                        pass
+                except Exception as e:
+                    logger.warning(f"nlp.pipe(batch_size={batch_size}, n_process={n_process}) failed: {e}")
+                    continue
+                timings[(batch_size, n_process)] = time.perf_counter() - started
+        
+        if timings:
+            self._best_batch_size, self._best_n_process = min(timings, key=timings.get)
+            logger.info(
+                f"Ukrainian NLP pipe tuned: batch_size={self._best_batch_size}, "
+                f"n_process={self._best_n_process}"
+            )
+        
+        return {'batch_size': self._batch_size(None), 'n_process': self._n_process(None)}
+    
+    def _batch_size(self, batch_size: Optional[int]) -> int:
+        """Explicit, tuned or configured batch size, never below MIN_PIPE_BATCH_SIZE."""
+        batch_size = batch_size or self._best_batch_size or getattr(settings, 'SPACY_BATCH_SIZE', 64)
+        return max(MIN_PIPE_BATCH_SIZE, batch_size)
+    
+    def _n_process(self, n_process: Optional[int]) -> int:
+        """Explicit or tuned process count, defaulting to one."""
+        return n_process or self._best_n_process or 1
+    
+    def process_texts(self, texts: List[str], batch_size: Optional[int] = None,
+                      n_process: Optional[int] = None) -> List[Optional[Any]]:
+        """
+        Process many texts with spaCy in batches via nlp.pipe().
+        
+        Args:
+            texts: Texts to process
+            batch_size: Texts per batch (defaults to the warmup() choice or settings.SPACY_BATCH_SIZE)
+            n_process: Worker processes for spaCy (defaults to the warmup() choice or 1)
+            
+        Returns:
+            List of spaCy Doc objects (or None for each text if not available)
+        """
+        if not self.available:
+            return [None] * len(texts)
+        
+        try:
+            return list(self._pipe(texts, batch_size, n_process))
+        except Exception as e:
+            logger.error(f"Error processing texts with Ukrainian NLP: {e}")
+            return [None] * len(texts)
+    
+    def _pipe(self, texts: List[str], batch_size: Optional[int] = None,
+              n_process: Optional[int] = None, task: Optional[str] = None):
+        """Stream Docs for texts through nlp.pipe(), limited to task's components if given."""
+        if task is not None:
+            with self._select_pipes(task):
+                return list(self._pipe(texts, batch_size, n_process))
+        
+        return self.nlp.pipe(
+            texts,
+            batch_size=self._batch_size(batch_size),
+            n_process=self._n_process(n_process)
+        )
+    
     def extract_entities(self, text: str) -> Dict[str, List[str]]:
         """
         Extract named entities from Ukrainian text.
@@ -78,25 +315,43 @@ class UkrainianNLP:
             return self._fallback_entity_extraction(text)
         
         try:
-            doc = self.nlp(text)
-            entities = {}
-            
-            for ent in doc.ents:
-                entity_type = ent.label_
-                entity_text = ent.text.strip()
-                
-                if entity_type not in entities:
-                    entities[entity_type] = []
-                
-                if entity_text and entity_text not in entities[entity_type]:
-                    entities[entity_type].append(entity_text)
-            
-            return entities
+            return self._run_cached('entities', [text], self._entities_from_doc)[0]
             
         except Exception as e:
             logger.error(f"Error extracting entities: {e}")
             return self._fallback_entity_extraction(text)
     
+    def extract_entities_batch(self, texts: List[str]) -> List[Dict[str, List[str]]]:
+        """
+        Extract named entities from many texts in one nlp.pipe() pass.
+        
+        Args:
+            texts: Texts to analyze
+            
+        Returns:
+            One entity dictionary per text
+        """
+        if not self.available:
+            return [self._fallback_entity_extraction(text) for text in texts]
+        
+        try:
+            return self._run_cached('entities', texts, self._entities_from_doc)
+        except Exception as e:
+            logger.error(f"Error extracting entities: {e}")
+            return [self._fallback_entity_extraction(text) for text in texts]
+    
+    def _entities_from_doc(self, doc) -> Dict[str, List[str]]:
+        """Group a Doc's entities by label, deduplicated in order of appearance."""
+        # Dicts as ordered sets: O(1) duplicate checks, first-seen order kept
+        entities = {}
+        
+        for ent in doc.ents:
+            entity_text = ent.text.strip()
+            if entity_text:
+                entities.setdefault(ent.label_, {})[entity_text] = None
+        
+        return {entity_type: list(texts) for entity_type, texts in entities.items()}
+    
     def extract_keywords(self, text: str, max_keywords: int = 15) -> List[str]:
         """
         Extract keywords from Ukrainian text using POS tagging and frequency.
@@ -112,32 +367,48 @@ class UkrainianNLP:
             return self._fallback_keyword_extraction(text, max_keywords)
         
         try:
-            doc = self.nlp(text)
-            
-            # Extract important words (nouns, adjectives, proper nouns)
-            important_pos = {'NOUN', 'ADJ', 'PROPN'}
-            keywords = []
-            
-            for token in doc:
-                if (token.pos_ in important_pos and 
-                    not token.is_stop and 
-                    not token.is_punct and 
-                    len(token.text) > 2 and
-                    token.text.isalpha()):
-                    
-                    lemma = token.lemma_.lower()
-                    if lemma not in keywords:
-                        keywords.append(lemma)
-            
-            # Simple frequency-based selection
-            from collections import Counter
-            word_freq = Counter(keywords)
-            return [word for word, _ in word_freq.most_common(max_keywords)]
+            return self._run_cached('keywords', [text], self._keywords_from_doc, max_keywords)[0]
             
         except Exception as e:
             logger.error(f"Error extracting keywords: {e}")
             return self._fallback_keyword_extraction(text, max_keywords)
     
+    def extract_keywords_batch(self, texts: List[str], max_keywords: int = 15) -> List[List[str]]:
+        """
+        Extract keywords from many texts in one nlp.pipe() pass.
+        
+        Args:
+            texts: Texts to analyze
+            max_keywords: Maximum number of keywords per text
+            
+        Returns:
+            One keyword list per text
+        """
+        if not self.available:
+            return [self._fallback_keyword_extraction(text, max_keywords) for text in texts]
+        
+        try:
+            return self._run_cached('keywords', texts, self._keywords_from_doc, max_keywords)
+        except Exception as e:
+            logger.error(f"Error extracting keywords: {e}")
+            return [self._fallback_keyword_extraction(text, max_keywords) for text in texts]
+    
+    def _keywords_from_doc(self, doc, max_keywords: int) -> List[str]:
+        """Select keyword lemmas (nouns, adjectives, proper nouns) from a Doc."""
+        # Count important words (nouns, adjectives, proper nouns) by lemma
+        word_freq = Counter()
+        
+        for token in doc:
+            if (token.pos_ in KEYWORD_POS and 
+                token.is_alpha and 
+                not token.is_stop and 
+                len(token) > 2):
+                
+                word_freq[token.lemma_.lower()] += 1
+        
+        # Simple frequency-based selection
+        return [word for word, _ in word_freq.most_common(max_keywords)]
+    
     def extract_sentences(self, text: str) -> List[str]:
         """
         Extract sentences from Ukrainian text.
@@ -152,14 +423,35 @@ class UkrainianNLP:
             return self._fallback_sentence_extraction(text)
         
         try:
-            doc = self.nlp(text)
-            sentences = [sent.text.strip() for sent in doc.sents if len(sent.text.strip()) > 10]
-            return sentences
+            return self._run_cached('sentences', [text], self._sentences_from_doc)[0]
             
         except Exception as e:
             logger.error(f"Error extracting sentences: {e}")
             return self._fallback_sentence_extraction(text)
     
+    def extract_sentences_batch(self, texts: List[str]) -> List[List[str]]:
+        """
+        Extract sentences from many texts in one nlp.pipe() pass.
+        
+        Args:
+            texts: Texts to process
+            
+        Returns:
+            One sentence list per text
+        """
+        if not self.available:
+            return [self._fallback_sentence_extraction(text) for text in texts]
+        
+        try:
+            return self._run_cached('sentences', texts, self._sentences_from_doc)
+        except Exception as e:
+            logger.error(f"Error extracting sentences: {e}")
+            return [self._fallback_sentence_extraction(text) for text in texts]
+    
+    def _sentences_from_doc(self, doc) -> List[str]:
+        """Sentences longer than 10 characters from a Doc."""
+        return [sent.text.strip() for sent in doc.sents if len(sent.text.strip()) > 10]
+    
     def get_language_stats(self, text: str) -> Dict[str, Any]:
         """
         Get language statistics for Ukrainian text.
@@ -174,29 +466,125 @@ class UkrainianNLP:
             return self._fallback_language_stats(text)
         
         try:
-            doc = self.nlp(text)
+            return self._run_cached('stats', [text], self._language_stats_from_doc)[0]
+            
+        except Exception as e:
+            logger.error(f"Error getting language stats: {e}")
+            return self._fallback_language_stats(text)
+    
+    def get_language_stats_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get language statistics for many texts in one nlp.pipe() pass.
+        
+        Args:
+            texts: Texts to analyze
+            
+        Returns:
+            One statistics dictionary per text
+        """
+        if not self.available:
+            return [self._fallback_language_stats(text) for text in texts]
+        
+        try:
+            return self._run_cached('stats', texts, self._language_stats_from_doc)
+        except Exception as e:
+            logger.error(f"Error getting language stats: {e}")
+            return [self._fallback_language_stats(text) for text in texts]
+    
+    def _language_stats_from_doc(self, doc) -> Dict[str, Any]:
+        """Token, sentence, entity and POS counts for a Doc."""
+        return {
+            'token_count': len(doc),
+            'sentence_count': sum(1 for _ in doc.sents),
+            'entity_count': len(doc.ents),
+            'pos_distribution': self._pos_distribution(doc),
+            'is_ukrainian': True
+        }
+    
+    def _pos_distribution(self, doc) -> Dict[str, int]:
+        """POS tag counts, tallied by spaCy over the token array."""
+        strings = doc.vocab.strings
+        return {strings[pos_id]: count for pos_id, count in doc.count_by(POS).items()}
+    
+    def analyze(self, text: str, max_keywords: int = 15) -> Dict[str, Any]:
+        """
+        Extract entities, keywords, sentences and language stats in one pass.
+        
+        Cheaper than calling the four methods separately: the text goes
+        through spaCy once and the Doc's tokens and sentences are walked once.
+        
+        Args:
+            text: Text to analyze
+            max_keywords: Maximum number of keywords to return
+            
+        Returns:
+            Dictionary with 'entities', 'keywords', 'sentences' and 'stats'
+        """
+        if not self.available:
+            return self._fallback_analysis(text, max_keywords)
+        
+        try:
+            return self._run_cached('analysis', [text], self._analysis_from_doc, max_keywords)[0]
             
-            pos_counts = {}
-            for token in doc:
-                pos = token.pos_
-                pos_counts[pos] = pos_counts.get(pos, 0) + 1
+        except Exception as e:
+            logger.error(f"Error analyzing text: {e}")
+            return self._fallback_analysis(text, max_keywords)
+    
+    def analyze_batch(self, texts: List[str], max_keywords: int = 15) -> List[Dict[str, Any]]:
+        """
+        Run analyze() over many texts in one nlp.pipe() pass.
+        
+        Args:
+            texts: Texts to analyze
+            max_keywords: Maximum number of keywords per text
             
-            return {
+        Returns:
+            One analysis dictionary per text
+        """
+        if not self.available:
+            return [self._fallback_analysis(text, max_keywords) for text in texts]
+        
+        try:
+            return self._run_cached('analysis', texts, self._analysis_from_doc, max_keywords)
+        except Exception as e:
+            logger.error(f"Error analyzing text: {e}")
+            return [self._fallback_analysis(text, max_keywords) for text in texts]
+    
+    def _analysis_from_doc(self, doc, max_keywords: int) -> Dict[str, Any]:
+        """Entities, keywords, sentences and stats from a single walk over a Doc."""
+        word_freq = Counter()
+        
+        for token in doc:
+            if (token.pos_ in KEYWORD_POS and 
+                token.is_alpha and 
+                not token.is_stop and 
+                len(token) > 2):
+                
+                word_freq[token.lemma_.lower()] += 1
+        
+        sentence_count = 0
+        sentences = []
+        for sent in doc.sents:
+            sentence_count += 1
+            sentence = sent.text.strip()
+            if len(sentence) > 10:
+                sentences.append(sentence)
+        
+        return {
+            'entities': self._entities_from_doc(doc),
+            'keywords': [word for word, _ in word_freq.most_common(max_keywords)],
+            'sentences': sentences,
+            'stats': {
                 'token_count': len(doc),
-                'sentence_count': len(list(doc.sents)),
+                'sentence_count': sentence_count,
                 'entity_count': len(doc.ents),
-                'pos_distribution': pos_counts,
+                'pos_distribution': self._pos_distribution(doc),
                 'is_ukrainian': True
             }
-            
-        except Exception as e:
-            logger.error(f"Error getting language stats: {e}")
-            return self._fallback_language_stats(text)
+        }
     
     def _fallback_entity_extraction(self, text: str) -> Dict[str, List[str]]:
         """Fallback entity extraction using regex patterns."""
-        import re
-        
         entities = {
             'PERSON': [],
             'ORG': [],
@@ -206,62 +594,39 @@ class UkrainianNLP:
         }
         
         # Ukrainian person names
-        person_pattern = r'\b[А-ЯІЇЄҐ][а-яіїєґ]+(?:\s[А-ЯІЇЄҐ][а-яіїєґ]+){1,2}\b'
-        entities['PERSON'] = list(set(re.findall(person_pattern, text)))
+        entities['PERSON'] = list(dict.fromkeys(_PERSON_RE.findall(text)))
         
         # Organizations
-        org_pattern = r'\b[А-ЯІЇЄҐ][а-яіїєґ\s]*(?:підприємство|компанія|корпорація|організація|міністерство|служба|установа|фонд|партія)\b'
-        entities['ORG'] = list(set(re.findall(org_pattern, text)))
+        entities['ORG'] = list(dict.fromkeys(_ORG_RE.findall(text)))
         
         # Locations
-        location_pattern = r'(?:у|в|з|до|від)\s+([А-ЯІЇЄҐ][а-яіїєґ]+(?:\s[А-ЯІЇЄҐ][а-яіїєґ]+)?)'
-        matches = re.findall(location_pattern, text)
-        entities['GPE'] = list(set(matches))
+        entities['GPE'] = list(dict.fromkeys(_LOCATION_RE.findall(text)))
         
         # Money amounts
-        money_pattern = r'(?:₴|грн\.?|\$|€)\s?[\d\s,]+(?:\.\d{2})?(?:\s*(?:мільйон|мільярд|трильйон|тисяч|млн|млрд))?'
-        entities['MONEY'] = list(set(re.findall(money_pattern, text, re.IGNORECASE)))
+        entities['MONEY'] = list(dict.fromkeys(_MONEY_RE.findall(text)))
         
         # Ukrainian dates
-        date_pattern = r'\b(?:січня|лютого|березня|квітня|травня|червня|липня|серпня|вересня|жовтня|листопада|грудня)\s+\d{1,2}(?:,?\s+\d{4})?\b'
-        entities['DATE'] = list(set(re.findall(date_pattern, text, re.IGNORECASE)))
+        entities['DATE'] = list(dict.fromkeys(_DATE_RE.findall(text)))
         
         return {k: v for k, v in entities.items() if v}
     
     def _fallback_keyword_extraction(self, text: str, max_keywords: int) -> List[str]:
         """Fallback keyword extraction using simple frequency analysis."""
-        import re
-        from collections import Counter
-        
-        # Ukrainian stop words
-        stop_words = {
-            'і', 'в', 'на', 'з', 'до', 'за', 'під', 'над', 'між', 'про', 'для',
-            'від', 'при', 'по', 'у', 'та', 'або', 'але', 'а', 'чи', 'не', 'ні',
-            'що', 'який', 'яка', 'яке', 'які', 'хто', 'де', 'коли', 'як', 'чому',
-            'це', 'той', 'та', 'те', 'ті', 'він', 'вона', 'воно', 'вони', 'я',
-            'ти', 'ми', 'ви', 'мій', 'твій', 'його', 'її', 'наш', 'ваш', 'їх'
-        }
-        
         # Extract words
-        words = re.findall(r'\b[а-яіїєґА-ЯІЇЄҐ]{3,}\b', text.lower())
-        words = [w for w in words if w not in stop_words]
-        
-        word_freq = Counter(words)
+        word_freq = Counter(
+            w for w in _UK_WORD_RE.findall(text.lower()) if w not in UKRAINIAN_STOP_WORDS
+        )
         return [word for word, _ in word_freq.most_common(max_keywords)]
     
     def _fallback_sentence_extraction(self, text: str) -> List[str]:
         """Fallback sentence extraction using simple splitting."""
-        import re
-        
-        sentences = re.split(r'[.!?]+', text)
+        sentences = _SENT_SPLIT_RE.split(text)
         sentences = [s.strip() for s in sentences if len(s.strip()) > 10]
         return sentences
     
     def _fallback_language_stats(self, text: str) -> Dict[str, Any]:
         """Fallback language statistics."""
-        import re
-        
-        words = re.findall(r'\b\w+\b', text)
+        words = _WORD_RE.findall(text)
         sentences = self._fallback_sentence_extraction(text)
         
         return {
@@ -269,7 +634,16 @@ class UkrainianNLP:
             'sentence_count': len(sentences),
             'entity_count': 0,
             'pos_distribution': {},
-            'is_ukrainian': bool(re.search(r'[іїєґ]', text.lower()))
+            'is_ukrainian': not _UK_CHARS.isdisjoint(text)
+        }
+    
+    def _fallback_analysis(self, text: str, max_keywords: int) -> Dict[str, Any]:
+        """Fallback combined analysis built from the individual fallbacks."""
+        return {
+            'entities': self._fallback_entity_extraction(text),
+            'keywords': self._fallback_keyword_extraction(text, max_keywords),
+            'sentences': self._fallback_sentence_extraction(text),
+            'stats': self._fallback_language_stats(text)
         }
 
 
@@ -1,10 +1,18 @@
 from rest_framework import generics, filters
 from rest_framework.pagination import PageNumberPagination
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models import Prefetch
+from articles.models import Article
+from articles.serializers import ArticleSerializer
 from .models import Narrative, NarrativeCluster, TimelineEvent
 from .serializers import NarrativeSerializer, NarrativeClusterSerializer, TimelineEventSerializer
 
 
+def serialized_articles(lookup):
+    """Prefetch only the article columns ArticleSerializer renders (skips embeddings)."""
+    return Prefetch(lookup, queryset=Article.objects.only(*ArticleSerializer.Meta.fields))
+
+
 class TimelinePagination(PageNumberPagination):
     page_size = 20
     page_size_query_param = 'page_size'
@@ -12,13 +20,19 @@ class TimelinePagination(PageNumberPagination):
 
 
 class NarrativeListView(generics.ListAPIView):
-    queryset = Narrative.objects.filter(is_active=True, support_count__gt=0)
+    queryset = Narrative.objects.filter(
+        is_active=True, support_count__gt=0
+    ).only(*NarrativeSerializer.Meta.fields)  # Only the serialized columns
     serializer_class = NarrativeSerializer
+    pagination_class = TimelinePagination
+    filter_backends = [filters.OrderingFilter]
     ordering = ['-support_count', '-created_at']  # Order by relevance first, then by creation date
 
 
 class TimelineView(generics.ListAPIView):
-    queryset = TimelineEvent.objects.filter(narrative__support_count__gt=0)
+    queryset = TimelineEvent.objects.filter(
+        narrative__support_count__gt=0
+    ).select_related('narrative').prefetch_related(serialized_articles('related_articles'))  # N+1 guard
     serializer_class = TimelineEventSerializer
     pagination_class = TimelinePagination
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
@@ -27,8 +41,11 @@ class TimelineView(generics.ListAPIView):
 
 
 class NarrativeClusterListView(generics.ListAPIView):
-    queryset = NarrativeCluster.objects.all()
+    queryset = NarrativeCluster.objects.defer('centroid').select_related('narrative').prefetch_related(
+        serialized_articles('articles')
+    )  # N+1 guard
     serializer_class = NarrativeClusterSerializer
+    pagination_class = TimelinePagination
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['narrative', 'cluster_date']
     ordering = ['-cluster_date']